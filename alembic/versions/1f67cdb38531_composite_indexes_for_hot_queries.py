@@ -0,0 +1,48 @@
+"""composite indexes for hot queries
+
+Revision ID: 1f67cdb38531
+Revises: 982a6e0c4864
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f67cdb38531'
+down_revision: Union[str, None] = '982a6e0c4864'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so these
+    # run in autocommit mode and don't lock the tables against writes.
+    with op.get_context().autocommit_block():
+        # per-user idea listing, ordered like the keyset listing
+        op.create_index('ix_ideas_user_id_created_at_id', 'ideas', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        # shared feed only ever reads is_shared = 1 rows
+        op.create_index('ix_ideas_shared_created_at_id', 'ideas', ['created_at', 'id'], unique=False, postgresql_where=sa.text('is_shared = 1'), postgresql_concurrently=True)
+        # duplicate title check in create_new_idea
+        op.create_index('ix_ideas_user_id_title', 'ideas', ['user_id', 'title'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_tags_user_id_name', 'tags', ['user_id', 'name'], unique=False, postgresql_concurrently=True)
+        # the primary key leads with id, so lookups by idea_id could not use it
+        op.create_index('ix_idea_tags_idea_id_tag_id', 'idea_tags', ['idea_id', 'tag_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_idea_scripts_idea_id_user_id', 'idea_scripts', ['idea_id', 'user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_idea_comments_idea_id', 'idea_comments', ['idea_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_idea_comments_idea_id', table_name='idea_comments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_idea_scripts_idea_id_user_id', table_name='idea_scripts', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_idea_tags_idea_id_tag_id', table_name='idea_tags', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_tags_user_id_name', table_name='tags', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_ideas_user_id_title', table_name='ideas', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_ideas_shared_created_at_id', table_name='ideas', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_ideas_user_id_created_at_id', table_name='ideas', postgresql_concurrently=True, if_exists=True)
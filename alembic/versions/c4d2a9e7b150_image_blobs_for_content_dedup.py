@@ -0,0 +1,46 @@
+"""image blobs for content dedup
+
+Revision ID: c4d2a9e7b150
+Revises: 1f67cdb38531
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2a9e7b150'
+down_revision: Union[str, None] = '1f67cdb38531'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_key', sa.String(length=255), nullable=False),
+    sa.Column('url', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    op.add_column('idea_images', sa.Column('blob_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'idea_images_blob_id_fkey', 'idea_images', 'image_blobs', ['blob_id'], ['id']
+    )
+    op.create_index('ix_idea_images_blob_id', 'idea_images', ['blob_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idea_images_blob_id', table_name='idea_images')
+    op.drop_constraint('idea_images_blob_id_fkey', 'idea_images', type_='foreignkey')
+    op.drop_column('idea_images', 'blob_id')
+    op.drop_table('image_blobs')
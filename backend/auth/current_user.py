@@ -0,0 +1,64 @@
+import os
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from backend import db
+from backend.core.ttl_cache import TTLCache
+
+from . import schema
+from .jwt import get_current_user
+from .models import User
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Column values of recently seen users, shared by the requests of this
+# worker so most of them skip the user lookup entirely. Users can't change
+# their details yet, so a short TTL is the only invalidation needed.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 30))
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+_USER_COLUMNS = ("username", "email", "role", "password")
+
+
+async def load_user(database: AsyncSession, token_data: schema.TokenData) -> User:
+    """
+    Returns the User row for a verified token, keyed by the id in the token.
+    The session's identity map and user_cache are tried before the database.
+    """
+    if token_data.id is None:
+        # tokens issued without an id can only be resolved by email
+        result = await database.execute(select(User).filter(User.email == token_data.email))
+        user = result.scalars().first()
+    else:
+        values = user_cache.get(token_data.id)
+        if values is not None:
+            user = User(values["username"], values["email"], values["role"], password_hash=values["password"])
+            user.id = token_data.id
+            make_transient_to_detached(user)
+            return await database.merge(user, load=False)
+        user = await database.get(User, token_data.id)
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"Authorization": "Bearer"}
+        )
+    user_cache.put(user.id, {column: getattr(user, column) for column in _USER_COLUMNS})
+    return user
+
+
+async def get_current_user_record(
+    current_user: schema.TokenData = Depends(get_current_user),
+    database: AsyncSession = Depends(db.get_async_db),
+) -> User:
+    """
+    The authenticated User row. FastAPI resolves a dependency once per
+    request, so every route and sub-dependency asking for it shares one load.
+    """
+    return await load_user(database, current_user)
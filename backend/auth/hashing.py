@@ -1,8 +1,30 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from dotenv import load_dotenv
+load_dotenv()
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU bound, so it runs in worker processes instead of on the event
+# loop. HASHING_MAX_PENDING caps how many hash/verify calls may be queued or
+# running at once; past that, callers get a 503 instead of piling up.
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", min(2, os.cpu_count() or 1)))
+HASHING_MAX_PENDING = int(os.getenv("HASHING_MAX_PENDING", HASHING_WORKERS * 8))
+HASHING_RETRY_AFTER_SECONDS = 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -10,3 +32,49 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     return pwd_context.hash(password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=HASHING_WORKERS)
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def pending_calls() -> int:
+    return _pending
+
+
+async def _run_bounded(func, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= HASHING_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly.",
+                headers={"Retry-After": str(HASHING_RETRY_AFTER_SECONDS)},
+            )
+        _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_bounded(get_password_hash, password)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_bounded(verify_password, plain_password, hashed_password)
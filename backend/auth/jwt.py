@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta
+import os
 
 from . import schema
+from .token_cache import VerifiedTokenCache
+from backend.core.log_context import set_user_id
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -11,6 +14,12 @@ SECRET_KEY = "20a9bfa73de3f29b6b7a01d4fc84bb569f1b7e8ac7f83c77c62a603f2bf9f5ff"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Tokens already verified by this worker, so repeat requests skip the decode
+# and HMAC check. Entries never outlive the token's exp; size 0 disables it.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 4096))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 300))
+token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS)
+
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -21,6 +30,9 @@ def create_access_token(data: dict):
 
 
 def verify_token(token: str, credentials_exception):
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -28,9 +40,10 @@ def verify_token(token: str, credentials_exception):
         if email is None:
             raise credentials_exception
         token_data = schema.TokenData(email=email, id=id)
-        return token_data
     except:
         raise credentials_exception
+    token_cache.put(token, token_data, payload.get("exp"))
+    return token_data
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
@@ -42,4 +55,6 @@ def get_current_user(data: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"Authorization": "Bearer"}
     )
-    return verify_token(data, credentials_exception)
+    token_data = verify_token(data, credentials_exception)
+    set_user_id(token_data.id)
+    return token_data
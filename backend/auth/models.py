@@ -18,11 +18,15 @@ class User(Base):
     tags = relationship("Tag", back_populates="user")
     
 
-    def __init__(self, username, email, role, password, *args, **kwargs):
+    def __init__(self, username, email, role, password_hash, *args, **kwargs):
         self.username = username
         self.email = email
         self.role = role
-        self.password = hashing.get_password_hash(password)
+        # Hashing happens off the event loop in hashing.hash_password; a
+        # plaintext password passed here by mistake must not get stored
+        if not password_hash or not hashing.pwd_context.identify(password_hash):
+            raise ValueError("User expects a bcrypt password hash, see hashing.hash_password")
+        self.password = password_hash
 
     def check_password(self, password):
         return hashing.verify_password(self.password, password)
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from backend import db
 from . import schema
 from . import services
 from . import validator
 
-from . jwt import create_access_token, get_current_user
+from . jwt import create_access_token
+from . current_user import get_current_user_record
 
 from . import hashing
 from . models import User
@@ -16,7 +18,7 @@ router = APIRouter(tags=['Auth'], prefix='/api/auth')
 
 @router.post('/register', status_code=status.HTTP_201_CREATED)
 async def create_user_registration(request: schema.User,
-                                   database: Session = Depends(db.get_db)):
+                                   database: AsyncSession = Depends(db.get_async_db)):
 
     user = await validator.verify_email_exist(request.email, database)
 
@@ -31,19 +33,20 @@ async def create_user_registration(request: schema.User,
 
 
 @router.get('/', response_model=List[schema.DisplayAccount])
-async def get_all_users(database: Session = Depends(db.get_db)):
+async def get_all_users(database: AsyncSession = Depends(db.get_async_db)):
     return await services.all_users(database)
 
 
 @router.post('/login')
-def login(request: schema.Login,
-          database: Session = Depends(db.get_db)):    
-    user = database.query(User).filter(User.email == request.email).first()
+async def login(request: schema.Login,
+                database: AsyncSession = Depends(db.get_async_db)):
+    result = await database.execute(select(User).filter(User.email == request.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if not hashing.verify_password(request.password, user.password):
+    if not await hashing.check_password(request.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Password")
 
@@ -54,8 +57,8 @@ def login(request: schema.Login,
 
 
 @router.get('/profile', response_model=schema.DisplayAccount)
-async def get_profile(database: Session = Depends(db.get_db), current_user: schema.User = Depends(get_current_user)):
-    return await services.get_profile(database, current_user)
+async def get_profile(current_user: User = Depends(get_current_user_record)):
+    return current_user
 
 
 
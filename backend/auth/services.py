@@ -1,21 +1,24 @@
 from fastapi import HTTPException, status
 from typing import List, Optional
+from sqlalchemy import select
 
+from . import hashing
 from . import schema
 from . import models
 
 
 async def new_user_register(request: schema.BaseModel, database) -> models.User:
+    hashed_password = await hashing.hash_password(request.password)
     try:
         new_user = models.User(username=request.username, email=request.email,
-                               password=request.password,
+                               password_hash=hashed_password,
                                role='user')                     
         database.add(new_user)
-        database.commit()
-        database.refresh(new_user)
+        await database.commit()
+        await database.refresh(new_user)
         return new_user
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while registering the user: {str(e)}"
@@ -24,7 +27,8 @@ async def new_user_register(request: schema.BaseModel, database) -> models.User:
 
 async def all_users(database) -> List[models.User]:
     try:
-        users = database.query(models.User).all()
+        result = await database.execute(select(models.User))
+        users = result.scalars().all()
         return users
     except Exception as e:
         raise HTTPException(
@@ -35,7 +39,7 @@ async def all_users(database) -> List[models.User]:
 
 async def get_user_by_id(user_id, database) -> Optional[models.User]:
     try:
-        user_info = database.query(models.User).get(user_id)
+        user_info = await database.get(models.User, user_id)
 
         if not user_info:
             raise HTTPException(
@@ -52,13 +56,3 @@ async def get_user_by_id(user_id, database) -> Optional[models.User]:
             detail=f"An error occurred while fetching the user by ID: {str(e)}"
         )
 
-
-async def get_profile(database, current_user) -> models.User:
-    try:
-        user = database.query(models.User).filter(models.User.email == current_user.email).first()
-        return user
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while fetching the user profile: {str(e)}"
-        )
@@ -0,0 +1,24 @@
+import hashlib
+from typing import Optional
+
+from backend.core.ttl_cache import TTLCache
+
+from . import schema
+
+
+class VerifiedTokenCache(TTLCache):
+    """
+    Tokens that already passed signature verification. Entries are keyed by
+    a SHA-256 digest of the token, so raw tokens are never held in memory,
+    and expire at the token's own exp at the latest.
+    """
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[schema.TokenData]:
+        return super().get(self._key(token))
+
+    def put(self, token: str, token_data: schema.TokenData, token_exp: Optional[float]):
+        super().put(self._key(token), token_data, expires_at=token_exp)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+# "redis" relays WebSocket traffic between workers, "memory" keeps it in-process
+WS_BUS = os.getenv("WS_BUS", "redis")
+WS_BUS_CHANNEL = os.getenv("WS_BUS_CHANNEL", "idea-ws")
+WS_BUS_RECONNECT_SECONDS = 1.0
+WS_BUS_STARTUP_TIMEOUT_SECONDS = 5.0
+
+MessageHandler = Callable[[str], Awaitable[None]]
+
+
+class BroadcastBus(ABC):
+    """
+    Relays WebSocket payloads between app workers. Every worker publishes
+    a payload once and the bus hands it to each worker's handler, the
+    publisher's own included, which then delivers to its local sockets.
+    """
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler):
+        ...
+
+    @abstractmethod
+    async def publish(self, payload: str):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+
+class InMemoryHub:
+    """Stands in for the broker: buses sharing a hub behave like workers sharing Redis."""
+
+    def __init__(self):
+        self.handlers: List[MessageHandler] = []
+
+
+class InMemoryBus(BroadcastBus):
+    def __init__(self, hub: Optional[InMemoryHub] = None):
+        self.hub = hub or InMemoryHub()
+        self.handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        self.handler = handler
+        self.hub.handlers.append(handler)
+
+    async def publish(self, payload: str):
+        for handler in list(self.hub.handlers):
+            await handler(payload)
+
+    async def close(self):
+        if self.handler in self.hub.handlers:
+            self.hub.handlers.remove(self.handler)
+        self.handler = None
+
+
+class RedisBus(BroadcastBus):
+    """
+    Redis pub/sub on one channel. The listener reconnects on its own if the
+    subscription connection drops; messages published meanwhile are lost,
+    which is acceptable for live WebSocket traffic.
+    """
+
+    def __init__(self, redis, channel: str = WS_BUS_CHANNEL):
+        self.redis = redis
+        self.channel = channel
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    async def start(self, handler: MessageHandler):
+        self._listener = asyncio.create_task(self._listen(handler))
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), WS_BUS_STARTUP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # keep serving; the listener goes on retrying in the background
+            logger.warning("WebSocket bus not subscribed yet, still retrying in the background.")
+
+    async def _listen(self, handler: MessageHandler):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self._subscribed.set()
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = message["data"]
+                        await handler(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("WebSocket bus subscription lost, reconnecting: %s", e)
+                await asyncio.sleep(WS_BUS_RECONNECT_SECONDS)
+
+    async def publish(self, payload: str):
+        await self.redis.publish(self.channel, payload)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+def create_bus(redis=None, kind: str = WS_BUS) -> BroadcastBus:
+    if kind == "redis":
+        return RedisBus(redis)
+    if kind == "memory":
+        return InMemoryBus()
+    raise ValueError(f"Unknown WS_BUS {kind!r}, expected 'redis' or 'memory'")
@@ -0,0 +1,143 @@
+import logging
+import os
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_PREFIX = "idea-cache"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 60))
+
+# Separates the namespace from the rest of a cache key, so the backend can
+# index every key under the namespace it belongs to.
+KEY_SEPARATOR = "|"
+
+
+def user_namespace(resource: str, user_id) -> str:
+    return f"{resource}:user:{user_id}"
+
+
+def ideas_namespace(user_id) -> str:
+    return user_namespace("ideas", user_id)
+
+
+def tags_namespace(user_id) -> str:
+    return user_namespace("tags", user_id)
+
+
+def scripts_namespace(user_id) -> str:
+    return user_namespace("scripts", user_id)
+
+
+# The shared feed looks the same to every user, so it has a single namespace.
+SHARED_IDEAS_NAMESPACE = "ideas:shared"
+
+
+class CacheBackend(RedisBackend):
+    """
+    RedisBackend that counts hits and misses and keeps a Redis set of the keys
+    stored under each namespace, so a namespace can be dropped precisely
+    without a KEYS/SCAN over the whole keyspace.
+    """
+
+    def __init__(self, redis):
+        super().__init__(redis)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _index_key(namespace: str) -> str:
+        return f"{namespace}{KEY_SEPARATOR}keys"
+
+    async def get_with_ttl(self, key: str):
+        ttl, value = await super().get_with_ttl(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return ttl, value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        index_key = self._index_key(key.split(KEY_SEPARATOR, 1)[0])
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, value, ex=expire)
+            pipe.sadd(index_key, key)
+            if expire:
+                # the index never needs to outlive the newest entry it lists
+                pipe.expire(index_key, expire)
+            await pipe.execute()
+
+    async def clear_namespaces(self, *namespaces: str) -> int:
+        index_keys = [self._index_key(f"{CACHE_PREFIX}:{namespace}") for namespace in namespaces]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            members = await pipe.execute()
+        keys = [key for keys in members for key in keys]
+        self.invalidations += 1
+        return await self.redis.delete(*keys, *index_keys)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def init_cache(redis) -> CacheBackend:
+    backend = CacheBackend(redis)
+    FastAPICache.init(backend, prefix=CACHE_PREFIX, expire=CACHE_TTL_SECONDS)
+    return backend
+
+
+def _request_suffix(request) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def user_key_builder(resource: str):
+    """
+    Key builder for routes whose response depends on the current user, e.g.
+    idea-cache:ideas:user:7|/api/ideas/?page=2&size=50
+    """
+    def build_key(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None):
+        current_user = kwargs["current_user"]
+        return f"{FastAPICache.get_prefix()}:{user_namespace(resource, current_user.id)}{KEY_SEPARATOR}{_request_suffix(request)}"
+
+    return build_key
+
+
+def shared_key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None):
+    return f"{FastAPICache.get_prefix()}:{SHARED_IDEAS_NAMESPACE}{KEY_SEPARATOR}{_request_suffix(request)}"
+
+
+async def invalidate(*namespaces: str):
+    """
+    Drops every cached response under the given namespaces. Called by the
+    services after a commit; a cache outage must not fail the write.
+    """
+    backend = FastAPICache._backend
+    if not isinstance(backend, CacheBackend) or not namespaces:
+        return
+    try:
+        await backend.clear_namespaces(*namespaces)
+    except Exception as e:
+        logger.warning("Failed to invalidate cache namespaces %s: %s", namespaces, str(e))
+
+
+def get_cache_stats() -> dict:
+    backend = FastAPICache._backend
+    if not isinstance(backend, CacheBackend):
+        return {"enabled": False}
+    return {"enabled": True, **backend.stats()}
@@ -0,0 +1,506 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aio_pika
+
+from backend.core.rabbitmq import EXCHANGE_NAME, EXCHANGE_TYPE
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+CONSUMER_QUEUE = os.getenv("CONSUMER_QUEUE", "notifications_queue")
+CONSUMER_BINDING_KEY = os.getenv("CONSUMER_BINDING_KEY", "#")
+# Deliveries the broker may have outstanding on the consumer's channel
+CONSUMER_PREFETCH = int(os.getenv("CONSUMER_PREFETCH", 64))
+# Handlers running at once
+CONSUMER_CONCURRENCY = int(os.getenv("CONSUMER_CONCURRENCY", 16))
+# Acks are sent as one multiple-ack once this many are ready...
+CONSUMER_ACK_BATCH = int(os.getenv("CONSUMER_ACK_BATCH", 32))
+# ...or after this long, whichever comes first
+CONSUMER_ACK_INTERVAL_MS = int(os.getenv("CONSUMER_ACK_INTERVAL_MS", 50))
+# How long stop() waits for in-flight messages before giving up on them
+CONSUMER_DRAIN_TIMEOUT_SECONDS = float(os.getenv("CONSUMER_DRAIN_TIMEOUT_SECONDS", 30))
+# Largest micro-batch a BatchConsumer hands to its handler...
+CONSUMER_BATCH_SIZE = int(os.getenv("CONSUMER_BATCH_SIZE", 50))
+# ...and how long it waits for a batch to fill after the first message
+CONSUMER_BATCH_WINDOW_MS = int(os.getenv("CONSUMER_BATCH_WINDOW_MS", 20))
+# Deliveries a message gets before it is parked in the dead-letter queue
+CONSUMER_MAX_ATTEMPTS = int(os.getenv("CONSUMER_MAX_ATTEMPTS", 5))
+# Delay before each retry; a delay queue is declared per tier and the last
+# tier is reused once attempts run past it
+CONSUMER_RETRY_DELAYS_MS = [
+    int(delay) for delay in os.getenv("CONSUMER_RETRY_DELAYS_MS", "1000,5000,25000,125000").split(",")
+]
+
+# Headers the consumer keeps on retried and dead-lettered messages
+ATTEMPTS_HEADER = "x-attempts"
+ROUTING_KEY_HEADER = "x-original-routing-key"
+ERROR_HEADER = "x-last-error"
+FAILED_AT_HEADER = "x-failed-at"
+
+
+def dead_letter_name(queue_name: str) -> str:
+    """Name of both the dead-letter exchange and the dead-letter queue."""
+    return f"{queue_name}.dead"
+
+
+def retry_queue_name(queue_name: str, delay_ms: int) -> str:
+    return f"{queue_name}.retry.{delay_ms}ms"
+
+
+def _copy(message, headers: dict) -> aio_pika.Message:
+    return aio_pika.Message(
+        body=message.body,
+        headers=headers,
+        content_type="application/json",
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        message_id=message.message_id,
+    )
+
+Handler = Callable[[str, dict], Awaitable[None]]
+
+
+@dataclass
+class Delivery:
+    """A decoded message as a batch handler sees it."""
+    routing_key: str
+    payload: dict
+    message: Any
+
+    @property
+    def attempts(self) -> int:
+        """Earlier failed deliveries of this message."""
+        return int((self.message.headers or {}).get(ATTEMPTS_HEADER, 0))
+
+
+class PartialBatchFailure(Exception):
+    """
+    Raised by a batch handler when only some deliveries failed. failures
+    maps a delivery's index in the batch to its error; those deliveries are
+    retried (or dead-lettered) and the rest of the batch is acked.
+    """
+
+    def __init__(self, failures: Dict[int, Exception]):
+        super().__init__(f"{len(failures)} deliveries in the batch failed")
+        self.failures = failures
+
+
+BatchHandler = Callable[[List[Delivery]], Awaitable[None]]
+
+
+class AckBatcher:
+    """
+    Coalesces acks into multiple-acks. A multiple-ack covers every delivery
+    up to its tag, so it can only go out for a run of settled deliveries at
+    the head of the delivery order; one slow message holds back the acks
+    behind it until it finishes. Nacks are sent at once, on their own, so a
+    later multiple-ack never covers a message that failed.
+    """
+
+    def __init__(self, batch_size: int = CONSUMER_ACK_BATCH, interval: float = CONSUMER_ACK_INTERVAL_MS / 1000):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        # [message, state] in delivery order; state is None (in flight), "ack" or "nacked"
+        self._deliveries: deque = deque()
+        self._entries = {}
+        self._ready = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self.ack_frames = 0
+
+    def track(self, message):
+        entry = [message, None]
+        self._deliveries.append(entry)
+        self._entries[message.delivery_tag] = entry
+
+    async def ack(self, message):
+        self._entries.pop(message.delivery_tag)[1] = "ack"
+        self._ready += 1
+        if self._ready >= self.batch_size:
+            await self.flush()
+        elif self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def nack(self, message, requeue: bool):
+        self._entries.pop(message.delivery_tag)[1] = "nacked"
+        await message.nack(requeue=requeue)
+        await self.flush()
+
+    async def flush(self):
+        last = None
+        while self._deliveries and self._deliveries[0][1] is not None:
+            message, state = self._deliveries.popleft()
+            if state == "ack":
+                last = message
+                self._ready -= 1
+        if last is not None:
+            self.ack_frames += 1
+            await last.ack(multiple=True)
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+        finally:
+            self._flusher = None
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+
+
+class NotificationConsumer:
+    """
+    Consumes the notification queue with up to `concurrency` handlers
+    running at once. The broker keeps up to `prefetch` deliveries
+    outstanding; they wait in a local buffer until a handler is free, so
+    prefetch should be at least concurrency. Handlers get the routing key
+    and the decoded JSON body.
+
+    Failed messages never go back to the head of the queue. A handler error
+    republishes the message to the delay queue for its attempt, whose TTL
+    dead-letters it back into the main queue once the delay is up, and acks
+    the original. After max_attempts deliveries it goes to the dead-letter
+    queue instead, carrying the attempt count, the last error and its
+    original routing key. Bodies that aren't JSON are rejected and reach
+    the dead-letter queue through the main queue's dead-letter exchange.
+
+    stop() cancels the subscription first, then lets the handlers finish
+    what was already delivered (up to drain_timeout) and flushes the
+    pending acks. Anything not finished by then is left unacked, and the
+    broker redelivers it when the channel closes.
+    """
+
+    def __init__(
+        self,
+        connection,
+        handler: Handler,
+        queue_name: str = CONSUMER_QUEUE,
+        binding_key: str = CONSUMER_BINDING_KEY,
+        prefetch: int = CONSUMER_PREFETCH,
+        concurrency: int = CONSUMER_CONCURRENCY,
+        ack_batch: int = CONSUMER_ACK_BATCH,
+        ack_interval_ms: int = CONSUMER_ACK_INTERVAL_MS,
+        drain_timeout: float = CONSUMER_DRAIN_TIMEOUT_SECONDS,
+        max_attempts: int = CONSUMER_MAX_ATTEMPTS,
+        retry_delays_ms: List[int] = CONSUMER_RETRY_DELAYS_MS,
+    ):
+        self.connection = connection
+        self.handler = handler
+        self.queue_name = queue_name
+        self.binding_key = binding_key
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.drain_timeout = drain_timeout
+        self.max_attempts = max_attempts
+        self.retry_delays_ms = list(retry_delays_ms)
+        # acks held back for a batch still occupy prefetch slots, so a batch
+        # may not take more than half of them
+        self.acks = AckBatcher(min(ack_batch, max(1, prefetch // 2)), ack_interval_ms / 1000)
+        self._buffer: asyncio.Queue = asyncio.Queue()
+        self._workers = []
+        self._channel = None
+        self._queue = None
+        self._dead_exchange = None
+        self._consumer_tag = None
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    async def start(self):
+        self._channel = await self.connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch)
+        exchange = await self._channel.declare_exchange(EXCHANGE_NAME, EXCHANGE_TYPE, durable=True)
+        await self._declare_failure_topology()
+        self._queue = await self._channel.declare_queue(
+            self.queue_name,
+            durable=True,
+            arguments={"x-dead-letter-exchange": dead_letter_name(self.queue_name)},
+        )
+        await self._queue.bind(exchange, routing_key=self.binding_key)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._consumer_tag = await self._queue.consume(self._on_message)
+        logger.info(
+            "Consuming %s (prefetch %s, %s handlers).", self.queue_name, self.prefetch, self.concurrency
+        )
+
+    async def _declare_failure_topology(self):
+        dead = dead_letter_name(self.queue_name)
+        self._dead_exchange = await self._channel.declare_exchange(dead, "fanout", durable=True)
+        dead_queue = await self._channel.declare_queue(dead, durable=True)
+        await dead_queue.bind(self._dead_exchange)
+        for delay in self.retry_delays_ms:
+            await self._channel.declare_queue(
+                retry_queue_name(self.queue_name, delay),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay,
+                    # expired messages go straight back to the main queue
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                },
+            )
+
+    async def _on_message(self, message):
+        self.received += 1
+        self.acks.track(message)
+        self._buffer.put_nowait(message)
+
+    async def _work(self):
+        while True:
+            message = await self._buffer.get()
+            try:
+                await self._process(message)
+            except Exception as e:
+                # settling failed, most likely because the channel is gone;
+                # the broker redelivers whatever wasn't acked
+                logger.warning("Could not settle message %s: %s", message.delivery_tag, e)
+            finally:
+                self._buffer.task_done()
+
+    async def _decode(self, message) -> Optional[Delivery]:
+        """Decodes a message, or rejects it and returns None if it isn't JSON."""
+        # retried messages come back through the default exchange under the queue's name
+        routing_key = (message.headers or {}).get(ROUTING_KEY_HEADER, message.routing_key)
+        try:
+            return Delivery(routing_key, json.loads(message.body), message)
+        except ValueError:
+            self.rejected += 1
+            logger.warning("Rejecting malformed message on %s: %r", routing_key, message.body[:200])
+            await self.acks.nack(message, requeue=False)
+            return None
+
+    async def _process(self, message):
+        delivery = await self._decode(message)
+        if delivery is None:
+            return
+        try:
+            await self.handler(delivery.routing_key, delivery.payload)
+        except Exception as e:
+            await self._failed(delivery, e)
+            return
+        self.processed += 1
+        await self.acks.ack(message)
+
+    async def _failed(self, delivery: Delivery, error: Exception):
+        self.failed += 1
+        logger.error(
+            "Handler failed for %s: %s", delivery.routing_key, error,
+            exc_info=(type(error), error, error.__traceback__),
+        )
+        await self._retry_later(delivery.message, delivery.routing_key, error)
+
+    async def _retry_later(self, message, routing_key: str, error: Exception):
+        attempts = int((message.headers or {}).get(ATTEMPTS_HEADER, 0)) + 1
+        headers = {
+            **(message.headers or {}),
+            ATTEMPTS_HEADER: attempts,
+            ROUTING_KEY_HEADER: routing_key,
+            ERROR_HEADER: f"{type(error).__name__}: {error}"[:500],
+            FAILED_AT_HEADER: datetime.utcnow().isoformat(),
+        }
+        if attempts >= self.max_attempts:
+            exchange, target = self._dead_exchange, routing_key
+        else:
+            delay = self.retry_delays_ms[min(attempts, len(self.retry_delays_ms)) - 1]
+            exchange, target = self._channel.default_exchange, retry_queue_name(self.queue_name, delay)
+        try:
+            # the copy is confirmed before the original is acked, so a crash
+            # in between means a duplicate, never a lost message
+            await exchange.publish(_copy(message, headers), routing_key=target)
+        except Exception as e:
+            logger.warning("Could not schedule a retry, requeueing instead: %s", e)
+            await self.acks.nack(message, requeue=True)
+            return
+        if exchange is self._dead_exchange:
+            self.dead_lettered += 1
+            logger.error(
+                "Dead-lettered %s after %s attempts: %s", routing_key, attempts, headers[ERROR_HEADER]
+            )
+        else:
+            self.retried += 1
+        await self.acks.ack(message)
+
+    async def stop(self):
+        if self._consumer_tag is not None:
+            await self._queue.cancel(self._consumer_tag)
+            self._consumer_tag = None
+        try:
+            await asyncio.wait_for(self._buffer.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Consumer drain timed out with %s messages unfinished.", self._buffer.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.acks.close()
+        if self._channel is not None and not self._channel.is_closed:
+            await self._channel.close()
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "buffered": self._buffer.qsize(),
+            "ack_frames": self.acks.ack_frames,
+        }
+
+
+class BatchConsumer(NotificationConsumer):
+    """
+    A NotificationConsumer whose handler takes micro-batches: each of the
+    `concurrency` workers collects up to batch_size deliveries, waiting at
+    most batch_window_ms after the first one, and hands them over in one
+    call, so a sink can write them with one multi-row insert. Acks for the
+    batch go out together once the handler returns.
+
+    A handler that returns normally acks the whole batch; raising
+    PartialBatchFailure retries only the deliveries it names, and any other
+    exception retries the whole batch. Retries go through the same delay
+    queues and dead-letter queue as single messages. For full batches,
+    prefetch should be at least batch_size * concurrency.
+    """
+
+    def __init__(
+        self,
+        connection,
+        handler: BatchHandler,
+        batch_size: int = CONSUMER_BATCH_SIZE,
+        batch_window_ms: int = CONSUMER_BATCH_WINDOW_MS,
+        **options,
+    ):
+        super().__init__(connection, handler, **options)
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window_ms / 1000
+        self.batches = 0
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._buffer.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                if self._buffer.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._buffer.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._buffer.get_nowait())
+            try:
+                await self._process_batch(batch)
+            except Exception as e:
+                logger.warning("Could not settle a batch of %s messages: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._buffer.task_done()
+
+    async def _process_batch(self, messages):
+        deliveries = [delivery for delivery in [await self._decode(m) for m in messages] if delivery]
+        if not deliveries:
+            return
+        self.batches += 1
+        try:
+            await self.handler(deliveries)
+            failures = {}
+        except PartialBatchFailure as e:
+            failures = e.failures
+        except Exception as e:
+            failures = {index: e for index in range(len(deliveries))}
+        for index, delivery in enumerate(deliveries):
+            if index in failures:
+                await self._failed(delivery, failures[index])
+            else:
+                self.processed += 1
+                await self.acks.ack(delivery.message)
+        await self.acks.flush()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "batches": self.batches}
+
+
+async def peek_dead_letters(connection, queue_name: str = CONSUMER_QUEUE, limit: int = 20) -> List[dict]:
+    """
+    Returns up to limit dead-lettered messages without removing them: they
+    are fetched unacked and go back to the queue when the channel closes.
+    """
+    channel = await connection.channel()
+    try:
+        dead_queue = await channel.declare_queue(dead_letter_name(queue_name), durable=True)
+        peeked = []
+        while len(peeked) < limit:
+            message = await dead_queue.get(no_ack=False, fail=False)
+            if message is None:
+                break
+            headers = message.headers or {}
+            peeked.append({
+                "routing_key": headers.get(ROUTING_KEY_HEADER, message.routing_key),
+                "attempts": headers.get(ATTEMPTS_HEADER),
+                "error": headers.get(ERROR_HEADER),
+                "failed_at": headers.get(FAILED_AT_HEADER),
+                "body": message.body.decode(errors="replace"),
+            })
+        return peeked
+    finally:
+        await channel.close()
+
+
+async def replay_dead_letters(
+    connection, queue_name: str = CONSUMER_QUEUE, limit: Optional[int] = None, batch_size: int = 100
+) -> int:
+    """
+    Moves dead-lettered messages back onto the main queue with their attempt
+    count reset, batch_size at a time: each batch is published with its
+    confirms awaited together, then acked with one multiple-ack. Returns how
+    many were moved.
+    """
+    channel = await connection.channel()
+    moved = 0
+    try:
+        dead_queue = await channel.declare_queue(dead_letter_name(queue_name), durable=True)
+        while limit is None or moved < limit:
+            batch = []
+            while len(batch) < batch_size and (limit is None or moved + len(batch) < limit):
+                message = await dead_queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                batch.append(message)
+            if not batch:
+                break
+            await asyncio.gather(*(
+                channel.default_exchange.publish(_copy(message, _replay_headers(message)), routing_key=queue_name)
+                for message in batch
+            ))
+            await batch[-1].ack(multiple=True)
+            moved += len(batch)
+        return moved
+    finally:
+        await channel.close()
+
+
+def _replay_headers(message) -> dict:
+    headers = {
+        key: value
+        for key, value in (message.headers or {}).items()
+        if key not in (ATTEMPTS_HEADER, ERROR_HEADER, FAILED_AT_HEADER, "x-death")
+    }
+    headers.setdefault(ROUTING_KEY_HEADER, message.routing_key)
+    return headers
@@ -0,0 +1,249 @@
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+import cloudinary
+from cloudinary import uploader
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.staticfiles import StaticFiles
+
+from backend.core.uploads import UPLOAD_CHUNK_SIZE, UploadInfo
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+# "cloudinary" or "local"
+IMAGE_STORE = os.getenv("IMAGE_STORE", "cloudinary")
+CLOUDINARY_FOLDER = os.getenv("CLOUDINARY_FOLDER", "idea_images")
+LOCAL_IMAGE_ROOT = os.getenv("LOCAL_IMAGE_ROOT", "media/images")
+LOCAL_IMAGE_BASE_URL = os.getenv("LOCAL_IMAGE_BASE_URL", "/media/images")
+
+
+@dataclass
+class StoredImage:
+    key: str
+    url: str
+    sha256: str
+    size: int
+
+
+class ImageStore(ABC):
+    """
+    Where uploaded image bytes live. Keys are derived from the SHA-256 of the
+    content, so the same bytes always map to the same key. save() is handed
+    an upload that consume_upload has already hashed and size-checked.
+
+    Stores that can resize on request set derives_variants and implement
+    variant_url(); the others implement read() and put(), and get rendered
+    variants written back through put(). A subclass missing the methods its
+    derives_variants calls for fails when it is defined.
+    """
+
+    derives_variants = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        required = ("variant_url",) if cls.derives_variants else ("read", "put")
+        missing = [name for name in required if getattr(cls, name) is getattr(ImageStore, name)]
+        if missing:
+            raise TypeError(
+                f"{cls.__name__} (derives_variants={cls.derives_variants}) must implement {', '.join(missing)}"
+            )
+
+    @abstractmethod
+    async def save(self, file: UploadFile, upload: UploadInfo) -> StoredImage:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        ...
+
+    # Variant support; which of these a store has depends on derives_variants
+
+    async def read(self, key: str) -> bytes:
+        raise NotImplementedError(f"{type(self).__name__} derives variants and does not read stored bytes")
+
+    async def put(self, key: str, data: bytes) -> str:
+        raise NotImplementedError(f"{type(self).__name__} derives variants and does not store rendered ones")
+
+    def variant_url(self, key: str, width: int, height: int) -> str:
+        raise NotImplementedError(f"{type(self).__name__} does not derive variants; render them and put() them")
+
+    async def close(self):
+        pass
+
+
+class CloudinaryImageStore(ImageStore):
+    """
+    Cloudinary-backed store. Credentials are set once here; every upload
+    goes through the SDK's single module-level urllib3 pool, in a worker
+    thread because the SDK is blocking.
+    """
+
+    # Cloudinary renders and caches resized copies from a transformation URL
+    derives_variants = True
+
+    def __init__(self, cloud_name=None, api_key=None, api_secret=None, folder: str = CLOUDINARY_FOLDER):
+        cloudinary.config(
+            cloud_name=cloud_name or os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=api_key or os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=api_secret or os.getenv("CLOUDINARY_API_SECRET"),
+            secure=True,
+        )
+        self.folder = folder
+
+    async def save(self, file: UploadFile, upload: UploadInfo) -> StoredImage:
+        await file.seek(0)
+        key = f"{self.folder}/{upload.sha256}"
+        result = await run_in_threadpool(uploader.upload, file.file, public_id=key)
+        url = result.get("secure_url")
+        if not url:
+            raise RuntimeError("Cloudinary did not return a URL for the upload.")
+        return StoredImage(key=key, url=url, sha256=upload.sha256, size=upload.size)
+
+    async def delete(self, key: str):
+        await run_in_threadpool(uploader.destroy, key)
+
+    def url_for(self, key: str) -> str:
+        return cloudinary.CloudinaryImage(key).build_url()
+
+    def variant_url(self, key: str, width: int, height: int) -> str:
+        return cloudinary.CloudinaryImage(key).build_url(
+            width=width, height=height, crop="limit", fetch_format="auto", quality="auto"
+        )
+
+
+class LocalImageStore(ImageStore):
+    """
+    Content-addressed files under root, laid out as ab/cd/<sha256><ext>.
+    Chunks are written to a temporary file under root and renamed into
+    place, so a half-written image is never visible at its final path.
+    """
+
+    def __init__(self, root: str = LOCAL_IMAGE_ROOT, base_url: str = LOCAL_IMAGE_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def _key(upload: UploadInfo) -> str:
+        # the extension decides the Content-Type files are served with, so it
+        # comes from the sniffed image type, not the client's filename
+        return f"{upload.sha256[:2]}/{upload.sha256[2:4]}/{upload.sha256}{upload.extension}"
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    async def save(self, file: UploadFile, upload: UploadInfo) -> StoredImage:
+        key = self._key(upload)
+        path = self.path_for(key)
+
+        def _save():
+            if os.path.exists(path):
+                return
+            file.file.seek(0)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=self.root)
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                        tmp.write(chunk)
+                # identical bytes land on the same path, so replacing is harmless
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        # every step touches the disk, so the whole copy runs in a worker thread
+        await run_in_threadpool(_save)
+        return StoredImage(key=key, url=self.url_for(key), sha256=upload.sha256, size=upload.size)
+
+    async def read(self, key: str) -> bytes:
+        def _read():
+            with open(self.path_for(key), "rb") as f:
+                return f.read()
+
+        return await run_in_threadpool(_read)
+
+    async def put(self, key: str, data: bytes) -> str:
+        path = self.path_for(key)
+
+        def _write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=self.root)
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+
+        await run_in_threadpool(_write)
+        return self.url_for(key)
+
+    async def delete(self, key: str):
+        def _delete():
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+
+        await run_in_threadpool(_delete)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class LocalImageFiles(StaticFiles):
+    """
+    Serves the local store from the API origin. nosniff makes browsers keep
+    to the image Content-Type the extension implies instead of guessing.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        return response
+
+
+_image_store: Optional[ImageStore] = None
+
+
+def create_image_store(kind: str = IMAGE_STORE) -> ImageStore:
+    if kind == "local":
+        return LocalImageStore()
+    if kind == "cloudinary":
+        return CloudinaryImageStore()
+    raise ValueError(f"Unknown IMAGE_STORE {kind!r}, expected 'cloudinary' or 'local'")
+
+
+def configure_image_store(store: Optional[ImageStore] = None) -> ImageStore:
+    """
+    Installs the process-wide image store, built from IMAGE_STORE unless one
+    is passed in. Called once from the app lifespan.
+    """
+    global _image_store
+    _image_store = store or create_image_store()
+    logger.info("Image store configured: %s", type(_image_store).__name__)
+    return _image_store
+
+
+def get_image_store() -> ImageStore:
+    if _image_store is None:
+        return configure_image_store()
+    return _image_store
+
+
+async def close_image_store():
+    global _image_store
+    if _image_store is not None:
+        await _image_store.close()
+        _image_store = None
@@ -0,0 +1,32 @@
+import io
+import os
+
+from PIL import Image, ImageOps
+
+# Variant name -> bounding box. Images are scaled down to fit, never up.
+IMAGE_VARIANTS = {
+    "thumb": (320, 320),
+    "web": (1600, 1600),
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_EXTENSION = ".webp"
+VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", 80))
+
+
+def variant_key(key: str, variant: str) -> str:
+    return f"{os.path.splitext(key)[0]}.{variant}{VARIANT_EXTENSION}"
+
+
+def render_variant(data: bytes, bounds) -> tuple[bytes, int, int]:
+    """
+    Returns (encoded bytes, width, height) of the image scaled to fit inside
+    bounds. CPU bound; call it from a worker thread.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(bounds)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        output = io.BytesIO()
+        image.save(output, VARIANT_FORMAT, quality=VARIANT_QUALITY)
+        return output.getvalue(), image.width, image.height
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from backend.core.ttl_cache import TTLCache
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Records allowed per message key per window before sampling starts; 0 disables the limit
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 20))
+LOG_RATE_WINDOW_SECONDS = float(os.getenv("LOG_RATE_WINDOW_SECONDS", 10))
+# Past the limit, one record in this many still gets through
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", 100))
+
+
+def _parse_level(value: str) -> int:
+    """A level name ("warning") or number ("30"); anything else fails at import."""
+    value = value.strip()
+    level = int(value) if value.isdigit() else logging.getLevelName(value.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level {value!r}")
+    return level
+
+
+# Records above this level are never limited
+LOG_RATE_LIMIT_MAX_LEVEL = _parse_level(os.getenv("LOG_RATE_LIMIT_MAX_LEVEL", "WARNING"))
+LOG_RATE_LIMIT_KEYS = 4096
+
+
+@dataclass
+class RequestContext:
+    """
+    Per-request fields stamped on every log record. The object itself is
+    shared, so dependencies running in the threadpool can still fill in
+    user_id after the middleware created it.
+    """
+    request_id: str
+    started: float = field(default_factory=time.perf_counter)
+    user_id: Optional[int] = None
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def begin_request(request_id: str):
+    """Starts the log context for a request; pass the result to end_request."""
+    return _request_context.set(RequestContext(request_id))
+
+
+def end_request(token):
+    _request_context.reset(token)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _request_context.get()
+
+
+def set_user_id(user_id: Optional[int]):
+    context = _request_context.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds request_id, user_id and latency_ms (time since the request began)
+    to records logged while serving a request. It has to run before records
+    are queued, in the caller's context, where the request is visible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_context.get()
+        if context is not None:
+            record.request_id = context.request_id
+            record.user_id = context.user_id
+            record.latency_ms = round((time.perf_counter() - context.started) * 1000, 2)
+        return True
+
+
+class _KeyWindow:
+    __slots__ = ("started", "count", "suppressed")
+
+    def __init__(self, now: float):
+        self.started = now
+        self.count = 0
+        self.suppressed = 0
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Bounds how often one kind of message is logged. Records are grouped by
+    a key: extra={"log_key": ...} if given, otherwise the logger, level and
+    unformatted message, so "Idea %s not found" is one key whatever the id.
+    Each key may log `limit` records per `window` seconds; after that only
+    every `sample_every`-th gets through, carrying `suppressed`, the number
+    dropped since the last one that did. Records above max_level always pass.
+    """
+
+    def __init__(
+        self,
+        limit: int = LOG_RATE_LIMIT,
+        window: float = LOG_RATE_WINDOW_SECONDS,
+        sample_every: int = LOG_SAMPLE_EVERY,
+        max_level: int = LOG_RATE_LIMIT_MAX_LEVEL,
+    ):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample_every = max(1, sample_every)
+        self.max_level = max_level
+        # windows outlive their period so a dropped count can still be reported
+        self._windows = TTLCache(LOG_RATE_LIMIT_KEYS, window * 10)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno > self.max_level:
+            return True
+        key = getattr(record, "log_key", None) or (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = _KeyWindow(now)
+                self._windows.put(key, window)
+            elif now - window.started >= self.window:
+                window.started, window.count = now, 0
+            window.count += 1
+            if window.count > self.limit and (window.count - self.limit) % self.sample_every:
+                window.suppressed += 1
+                return False
+            if window.suppressed:
+                record.suppressed = window.suppressed
+                window.suppressed = 0
+        return True
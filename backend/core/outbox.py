@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.ideas.models import OutboxEvent
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+# Events published per broker round trip
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+# How often the relay looks for events when no commit has woken it up
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 1))
+# Pause after a failed relay attempt before trying again
+OUTBOX_RETRY_SECONDS = float(os.getenv("OUTBOX_RETRY_SECONDS", 5))
+OUTBOX_SHUTDOWN_TIMEOUT_SECONDS = 5.0
+
+_PENDING_KEY = "outbox_pending"
+
+
+def record_event(database: AsyncSession, routing_key: str, data: dict):
+    """
+    Adds a domain event to the session. It is written by the caller's own
+    commit, so it exists exactly when the change it describes does; nothing
+    here touches the broker.
+    """
+    # round-trip through JSON so datetimes and the like are stored as strings
+    payload = json.loads(json.dumps(data, default=str))
+    database.add(OutboxEvent(routing_key=routing_key, payload=payload))
+    database.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay_after_commit(session: Session):
+    if session.info.pop(_PENDING_KEY, False) and _relay is not None:
+        _relay.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_events(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _envelope(outbox_event: OutboxEvent) -> dict:
+    return {
+        "event_id": outbox_event.id,
+        "event": outbox_event.routing_key,
+        "occurred_at": outbox_event.created_at.isoformat(),
+        "data": outbox_event.payload,
+    }
+
+
+class OutboxRelay:
+    """
+    Moves outbox rows to RabbitMQ. Each pass locks up to batch_size of the
+    oldest rows (skipping rows another worker's relay holds), publishes them
+    in one confirm batch and deletes them in the same transaction. If the
+    process dies after the confirm but before the delete, the rows are sent
+    again: delivery is at-least-once, and consumers can dedupe on event_id.
+
+    A commit that recorded events wakes the relay at once; otherwise it
+    polls every poll_interval seconds, which also picks up events committed
+    by other processes.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        publisher,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+        retry_interval: float = OUTBOX_RETRY_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.batches = 0
+        self.failures = 0
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def relay_batch(self) -> int:
+        """Publishes and removes one batch; returns how many events it moved."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(OutboxEvent)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = result.scalars().all()
+            if not events:
+                return 0
+            await self.publisher.publish_batch(
+                [(outbox_event.routing_key, _envelope(outbox_event)) for outbox_event in events]
+            )
+            await session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events]))
+            )
+            await session.commit()
+        self.published += len(events)
+        self.batches += 1
+        return len(events)
+
+    async def drain(self) -> int:
+        """Relays batches until the outbox is empty."""
+        total = 0
+        while True:
+            moved = await self.relay_batch()
+            total += moved
+            if moved < self.batch_size:
+                return total
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.drain()
+                delay = self.poll_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Outbox relay failed, retrying in %ss: %s", self.retry_interval, e)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # last chance for events committed just before shutdown; whatever is
+        # left goes out with the next start
+        try:
+            await asyncio.wait_for(self.drain(), OUTBOX_SHUTDOWN_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning("Outbox not fully drained at shutdown: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "published": self.published,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+_relay: Optional[OutboxRelay] = None
+
+
+def start_relay(session_factory, publisher) -> OutboxRelay:
+    """Starts the process-wide relay. Called once from the app lifespan."""
+    global _relay
+    _relay = OutboxRelay(session_factory, publisher)
+    _relay.start()
+    return _relay
+
+
+def get_relay() -> Optional[OutboxRelay]:
+    return _relay
+
+
+async def stop_relay():
+    global _relay
+    if _relay is not None:
+        relay, _relay = _relay, None
+        await relay.stop()
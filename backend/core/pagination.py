@@ -0,0 +1,29 @@
+from typing import Generic, TypeVar
+
+from fastapi import Query
+from fastapi_pagination.bases import CursorRawParams
+from fastapi_pagination.cursor import CursorPage, CursorParams
+
+
+T = TypeVar("T")
+
+
+class KeysetParams(CursorParams):
+    """
+    Cursor params for keyset pagination. Each page seeks past the last row of
+    the previous one through the listing's ORDER BY columns, so deep pages
+    cost the same as the first. Counting every matching row is opt-in.
+    """
+
+    include_total: bool = Query(False, description="Also return the total number of items")
+
+    def to_raw_params(self) -> CursorRawParams:
+        return CursorRawParams(
+            cursor=self.decode_cursor(self.cursor),
+            size=self.size,
+            include_total=self.include_total,
+        )
+
+
+class KeysetPage(CursorPage[T], Generic[T]):
+    __params_type__ = KeysetParams
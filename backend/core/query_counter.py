@@ -0,0 +1,30 @@
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    Records every SQL statement sent through an engine while the block is active.
+
+        with QueryCounter(db.async_engine) as queries:
+            ...
+        assert queries.count == 4
+    """
+
+    def __init__(self, engine):
+        # AsyncEngine events are registered on the wrapped sync engine
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
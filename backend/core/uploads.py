@@ -0,0 +1,80 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+from dotenv import load_dotenv
+load_dotenv()
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+
+
+@dataclass
+class UploadInfo:
+    sha256: str
+    size: int
+    # taken from the sniffed image type, never from the client's filename
+    extension: str = ""
+    content_type: str = ""
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """(extension, content type) for the accepted image formats, from their magic bytes."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png", "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg", "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif", "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp", "image/webp"
+    return None
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Uploaded file exceeds the {max_bytes} byte limit.",
+    )
+
+
+async def consume_upload(file: UploadFile, max_bytes: Optional[int] = None) -> UploadInfo:
+    """
+    Reads an upload chunk by chunk to hash and size it, without collecting
+    the chunks; the store reads the file again, from Starlette's spooled
+    temporary file, only when the bytes aren't stored yet. Raises 413 as
+    soon as the upload passes max_bytes (IMAGE_UPLOAD_MAX_BYTES by default)
+    and 400 if it is empty or not a PNG, JPEG, GIF or WebP image.
+    """
+    if max_bytes is None:
+        max_bytes = IMAGE_UPLOAD_MAX_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if len(head) < 12:
+            head += chunk[:12 - len(head)]
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        digest.update(chunk)
+
+    if size == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded file is empty.",
+        )
+    image_type = sniff_image_type(head)
+    if image_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only PNG, JPEG, GIF and WebP images can be uploaded.",
+        )
+    extension, content_type = image_type
+    return UploadInfo(sha256=digest.hexdigest(), size=size, extension=extension, content_type=content_type)
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Dict, Optional, Set
+
+from fastapi import WebSocket, status
+
+from backend.core.broadcast import BroadcastBus
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger("idea_app")
+
+# Messages a connection may have waiting before it counts as a slow consumer
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 256))
+# Longest a single send may take before the connection is dropped
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", 5))
+# Batching window for connections that don't ask for one, 0 sends each message alone
+WS_BATCH_WINDOW_MS = int(os.getenv("WS_BATCH_WINDOW_MS", 0))
+WS_BATCH_MAX_WINDOW_MS = 250
+WS_BATCH_MAX_MESSAGES = int(os.getenv("WS_BATCH_MAX_MESSAGES", 100))
+
+
+class _Connection:
+    """A socket with its own outbound queue, drained by a dedicated sender task."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int, batch_window: float, user_id: Optional[int] = None):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: asyncio.Task = None
+        self.topics: Set[str] = set()
+        self.batch_window = batch_window
+
+
+def idea_topic(idea_id) -> str:
+    return f"idea:{idea_id}"
+
+
+def user_topic(user_id) -> str:
+    return f"user:{user_id}"
+
+
+TOPIC_PATTERN = re.compile(r"^(idea|user):\d+$")
+
+
+class ConnectionManager:
+    """
+    Tracks open WebSockets and fans messages out to them. Sending only puts
+    the message on each connection's bounded queue, so a broadcast costs the
+    same whatever the clients do; a sender task per connection does the
+    actual writes. A connection whose queue overflows or whose send times
+    out is dropped and closed instead of holding up everyone else.
+
+    With a bus attached, a broadcast is published once to the bus and every
+    worker, this one included, delivers it to its own sockets.
+
+    Sockets can also subscribe to topics (idea_topic, user_topic); publish()
+    then reaches only the subscribers of that topic, found through the
+    topic -> connections index. revoke() ends a topic's subscriptions when
+    the access they were granted on goes away.
+
+    A connection opened with a batch window gets everything queued during
+    that window as one frame: a JSON array holding each message as the
+    string it would otherwise have been sent as.
+    """
+
+    def __init__(self, queue_size: int = WS_SEND_QUEUE_SIZE, send_timeout: float = WS_SEND_TIMEOUT_SECONDS):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.active_connections: Dict[WebSocket, _Connection] = {}
+        self.topics: Dict[str, Set[_Connection]] = {}
+        self.dropped = 0
+        self.frames_sent = 0
+        self.messages_sent = 0
+        # close() calls in flight, kept referenced until they finish
+        self._closing: Set[asyncio.Task] = set()
+        self.bus: Optional[BroadcastBus] = None
+
+    async def start_bus(self, bus: BroadcastBus):
+        await bus.start(self._on_bus_message)
+        self.bus = bus
+
+    async def stop_bus(self):
+        if self.bus is not None:
+            bus, self.bus = self.bus, None
+            await bus.close()
+
+    async def connect(
+        self, websocket: WebSocket, batch_window_ms: Optional[int] = None, user_id: Optional[int] = None
+    ):
+        """
+        Accepts a new WebSocket connection and starts its sender task.
+        batch_window_ms (capped at WS_BATCH_MAX_WINDOW_MS) turns on batching
+        for this connection; None uses WS_BATCH_WINDOW_MS. user_id is the
+        authenticated user, if any, used by revoke().
+        """
+        await websocket.accept()
+        if batch_window_ms is None:
+            batch_window_ms = WS_BATCH_WINDOW_MS
+        batch_window = max(0, min(batch_window_ms, WS_BATCH_MAX_WINDOW_MS)) / 1000
+        connection = _Connection(websocket, self.queue_size, batch_window, user_id)
+        connection.sender = asyncio.create_task(self._send_loop(connection))
+        self.active_connections[websocket] = connection
+        logger.info("New connection established: %s", websocket.client)
+
+    def disconnect(self, websocket: WebSocket):
+        """
+        Forgets a WebSocket and stops its sender. Safe to call more than once.
+        """
+        connection = self.active_connections.pop(websocket, None)
+        if connection is None:
+            return
+        for topic in list(connection.topics):
+            self._remove_subscriber(topic, connection)
+        if connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+        logger.info("Connection disconnected: %s", websocket.client)
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections.get(websocket)
+        if connection is None:
+            return
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._remove_subscriber(topic, connection)
+
+    def _remove_subscriber(self, topic: str, connection: _Connection):
+        connection.topics.discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    async def send_personal_message(self, message: str, websocket: WebSocket):
+        """
+        Queues a message for a specific WebSocket client.
+        """
+        connection = self.active_connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, message)
+
+    async def broadcast(self, message: str):
+        """
+        Sends a message to every WebSocket client, on every worker when a
+        bus is attached.
+        """
+        await self._publish(None, message)
+
+    async def publish(self, topic: str, message: str):
+        """
+        Sends a message to the clients subscribed to topic, on every worker
+        when a bus is attached.
+        """
+        await self._publish(topic, message)
+
+    async def revoke(self, topic: str, keep_user_id: Optional[int] = None):
+        """
+        Unsubscribes everyone but keep_user_id's connections from topic, on
+        every worker when a bus is attached, and tells them so.
+        """
+        if self.bus is not None:
+            try:
+                await self.bus.publish(json.dumps({"topic": topic, "revoke": True, "keep_user_id": keep_user_id}))
+                return
+            except Exception as e:
+                logger.warning("WebSocket bus publish failed, revoking locally only: %s", e)
+        self._revoke(topic, keep_user_id)
+
+    async def _publish(self, topic: Optional[str], message: str):
+        if self.bus is None:
+            self._deliver(topic, message)
+            return
+        try:
+            await self.bus.publish(json.dumps({"topic": topic, "message": message}))
+        except Exception as e:
+            logger.warning("WebSocket bus publish failed, delivering locally only: %s", e)
+            self._deliver(topic, message)
+
+    async def _on_bus_message(self, payload: str):
+        try:
+            envelope = json.loads(payload)
+            topic = envelope.get("topic")
+            if envelope.get("revoke"):
+                self._revoke(topic, envelope.get("keep_user_id"))
+                return
+            message = envelope["message"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed WebSocket bus payload: %r", payload)
+            return
+        self._deliver(topic, message)
+
+    def _revoke(self, topic: str, keep_user_id: Optional[int]):
+        notice = json.dumps({"event": "unsubscribed", "topic": topic, "reason": "access revoked"})
+        for connection in list(self.topics.get(topic, ())):
+            if keep_user_id is not None and connection.user_id == keep_user_id:
+                continue
+            self._remove_subscriber(topic, connection)
+            self._enqueue(connection, notice)
+
+    def _deliver(self, topic: Optional[str], message: str):
+        if topic is None:
+            recipients = list(self.active_connections.values())
+        else:
+            recipients = list(self.topics.get(topic, ()))
+        for connection in recipients:
+            self._enqueue(connection, message)
+
+    def _enqueue(self, connection: _Connection, message: str):
+        try:
+            connection.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._drop(connection, "outbound queue full")
+
+    async def _send_loop(self, connection: _Connection):
+        websocket = connection.websocket
+        while True:
+            message = await connection.queue.get()
+            count = 1
+            if connection.batch_window:
+                # let the burst build up, then send it as one frame
+                await asyncio.sleep(connection.batch_window)
+                batch = [message]
+                while len(batch) < WS_BATCH_MAX_MESSAGES and not connection.queue.empty():
+                    batch.append(connection.queue.get_nowait())
+                message, count = json.dumps(batch), len(batch)
+            try:
+                await asyncio.wait_for(websocket.send_text(message), self.send_timeout)
+                self.frames_sent += 1
+                self.messages_sent += count
+            except asyncio.TimeoutError:
+                self._drop(connection, "send timed out")
+                return
+            except Exception as e:
+                self._drop(connection, f"send failed: {e}")
+                return
+
+    def _drop(self, connection: _Connection, reason: str):
+        if self.active_connections.get(connection.websocket) is not connection:
+            return
+        self.dropped += 1
+        logger.warning("Dropping WebSocket client %s: %s", connection.websocket.client, reason)
+        self.disconnect(connection.websocket)
+        task = asyncio.create_task(self._close(connection.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=status.WS_1013_TRY_AGAIN_LATER), self.send_timeout
+            )
+        except Exception:
+            # the client is being dropped anyway; a failed close changes nothing
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.active_connections),
+            "topics": len(self.topics),
+            "queued": sum(c.queue.qsize() for c in self.active_connections.values()),
+            "dropped": self.dropped,
+            "frames_sent": self.frames_sent,
+            "messages_sent": self.messages_sent,
+        }
+
+
+manager = ConnectionManager()
+
+
+async def publish_event(topic: str, event: str, data: dict):
+    """Pushes a JSON event frame to the subscribers of topic."""
+    await manager.publish(
+        topic, json.dumps({"event": event, "topic": topic, "data": data}, default=str)
+    )
+
+
+async def revoke_subscriptions(topic: str, keep_user_id: Optional[int] = None):
+    """Ends subscriptions to topic, except keep_user_id's, e.g. once an idea is unshared."""
+    await manager.revoke(topic, keep_user_id)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Integer
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Integer, Index, UniqueConstraint, JSON, text
 
 from backend.db import Base
 
@@ -22,6 +22,18 @@ class Idea(Base):
     scripts = relationship("IdeaScript", back_populates="idea", cascade="all, delete-orphan")
     comments = relationship("IdeaComment", back_populates="idea", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_ideas_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_ideas_shared_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_shared = 1"),
+            sqlite_where=text("is_shared = 1"),
+        ),
+        Index("ix_ideas_user_id_title", "user_id", "title"),
+    )
+
 
 class Tag(Base):
     __tablename__ = "tags"
@@ -35,6 +47,8 @@ class Tag(Base):
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     user = relationship("User", back_populates="tags")
 
+    __table_args__ = (Index("ix_tags_user_id_name", "user_id", "name"),)
+
 
 class IdeaTag(Base):
     __tablename__ = "idea_tags"
@@ -43,6 +57,8 @@ class IdeaTag(Base):
     idea_id = Column(Integer, ForeignKey("ideas.id", ondelete="CASCADE"), primary_key=True)
     tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
 
+    __table_args__ = (Index("ix_idea_tags_idea_id_tag_id", "idea_id", "tag_id"),)
+
 
 class IdeaComment(Base):
     __tablename__ = "idea_comments"
@@ -56,6 +72,8 @@ class IdeaComment(Base):
     idea = relationship("Idea", back_populates="comments")
     user = relationship("User")
 
+    __table_args__ = (Index("ix_idea_comments_idea_id", "idea_id"),)
+
 
 class IdeaScript(Base):
     __tablename__ = "idea_scripts"
@@ -69,6 +87,8 @@ class IdeaScript(Base):
 
     idea = relationship("Idea", back_populates="scripts")
 
+    __table_args__ = (Index("ix_idea_scripts_idea_id_user_id", "idea_id", "user_id"),)
+
 
 class IdeaImage(Base):
     __tablename__ = "idea_images"
@@ -80,5 +100,66 @@ class IdeaImage(Base):
     image_type = Column(String(50), nullable=False)  # e.g., 'thumbnail', 'full', etc.
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    blob_id = Column(Integer, ForeignKey("image_blobs.id"), nullable=True)
+
+    blob = relationship("ImageBlob")
+
+    __table_args__ = (Index("ix_idea_images_blob_id", "blob_id"),)
+
+
+class ImageBlob(Base):
+    """
+    One stored copy of some image bytes, shared by every IdeaImage with the
+    same content. ref_count tracks how many IdeaImage rows point at it.
+    """
+    __tablename__ = "image_blobs"
+
+    id = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    storage_key = Column(String(255), nullable=False)
+    url = Column(String(255), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    variants = relationship("ImageVariant", back_populates="blob", passive_deletes=True)
+
+
+class ImageVariant(Base):
+    """
+    A resized rendition of a blob (e.g. 'thumb', 'web'). storage_key is NULL
+    when the store derives the variant on the fly from the original's URL.
+    """
+    __tablename__ = "image_variants"
+
+    id = Column(Integer, primary_key=True)
+    blob_id = Column(Integer, ForeignKey("image_blobs.id", ondelete="CASCADE"), nullable=False)
+    variant = Column(String(20), nullable=False)
+    storage_key = Column(String(255), nullable=True)
+    url = Column(String(255), nullable=False)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    size = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    blob = relationship("ImageBlob", back_populates="variants")
+
+    __table_args__ = (
+        UniqueConstraint("blob_id", "variant", name="uq_image_variants_blob_id_variant"),
+    )
+
+
+
 
+class OutboxEvent(Base):
+    """
+    A domain event waiting to be relayed to RabbitMQ. Rows are inserted in
+    the same transaction as the change they describe and deleted once the
+    broker has confirmed them (see backend/core/outbox.py).
+    """
+    __tablename__ = "outbox_events"
 
+    id = Column(Integer, primary_key=True)
+    routing_key = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
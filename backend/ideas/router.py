@@ -1,14 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, Response, File, UploadFile
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, status, Response, File, UploadFile
+from fastapi.responses import RedirectResponse
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate as sqlalchemy_paginate
+from fastapi_pagination.ext.sqlalchemy import apaginate as sqlalchemy_paginate
+from fastapi_cache.decorator import cache
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.auth.jwt import get_current_user
+from backend.auth.current_user import get_current_user_record
 from backend.auth.models import User
 
 
 from backend import db
+from backend.core.pagination import KeysetPage
+from backend.core.cache import user_key_builder, shared_key_builder
 
 from . import schema
 from . import services
@@ -21,43 +26,64 @@ router = APIRouter(tags=["Idea"], prefix="/api/ideas")
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schema.IdeaCreateResponse)
 async def create_new_idea(
     request: schema.IdeaBase,
-    database: Session = Depends(db.get_db),
-    current_user: User = Depends(get_current_user),
+    database: AsyncSession = Depends(db.get_async_db),
+    user: User = Depends(get_current_user_record),
 ):
-    user = database.query(User).filter(User.email == current_user.email).first()
     result = await services.create_new_idea(request, database, user)
     return result
 
 
-@router.get("/", status_code=status.HTTP_200_OK, response_model=Page[schema.IdeaList])# Cache for 1 minute
+@router.get("/", status_code=status.HTTP_200_OK, response_model=Page[schema.IdeaList])
+@cache(key_builder=user_key_builder("ideas"))
 async def idea_list(
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     idea_query = await services.get_idea_listing(database, current_user.id) # Renamed service function slightly
-    return sqlalchemy_paginate(database,idea_query)
+    return await sqlalchemy_paginate(database,idea_query)
 
 
 @router.get("/shared", status_code=status.HTTP_200_OK, response_model=Page[schema.IdeaList])
+@cache(key_builder=shared_key_builder)
 async def shared_idea_list(
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
     request: None = None,
     response: Response = None,
 ):
     shared_ideas_query = await services.get_shared_idea_listing(database, current_user)
-    return sqlalchemy_paginate(database, shared_ideas_query)
+    return await sqlalchemy_paginate(database, shared_ideas_query)
+
+
+@router.get("/cursor", status_code=status.HTTP_200_OK, response_model=KeysetPage[schema.IdeaList])
+async def idea_list_cursor(
+    database: AsyncSession = Depends(db.get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    idea_query = await services.get_idea_listing(database, current_user.id)
+    return await sqlalchemy_paginate(database, idea_query.order_by(*services.IDEA_KEYSET_ORDER))
+
+
+@router.get("/shared/cursor", status_code=status.HTTP_200_OK, response_model=KeysetPage[schema.IdeaList])
+async def shared_idea_list_cursor(
+    database: AsyncSession = Depends(db.get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    shared_ideas_query = await services.get_shared_idea_listing(database, current_user)
+    return await sqlalchemy_paginate(database, shared_ideas_query.order_by(*services.IDEA_KEYSET_ORDER))
 
 
 @router.get(
     "/{idea_id}", status_code=status.HTTP_200_OK, response_model=schema.IdeaList
 )
+@cache(key_builder=user_key_builder("ideas"))
 async def get_idea_by_id(
     idea_id: int,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    return await services.get_idea_by_id(idea_id, current_user.id, database)
+    idea = await services.get_idea_by_id(idea_id, current_user.id, database)
+    return schema.IdeaList.model_validate(idea)
 
 
 @router.delete(
@@ -65,7 +91,7 @@ async def get_idea_by_id(
 )
 async def delete_idea_by_id(
     idea_id: str,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.delete_idea_by_id(idea_id, current_user, database)
@@ -77,7 +103,7 @@ async def delete_idea_by_id(
 async def update_idea_by_id(
     idea_id: int,
     request: schema.IdeaUpdate,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.update_idea_by_id(idea_id, request, current_user, database)
@@ -88,7 +114,7 @@ async def update_idea_by_id(
 async def add_tags_to_idea(
     idea_id: int,
     request: AddTag,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.add_tags_to_idea(idea_id, request.tags, current_user, database)
@@ -100,7 +126,7 @@ async def add_tags_to_idea(
 async def add_comments_to_idea(
     idea_id: int,
     request: schema.AddIdeaComment,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.add_comments_to_idea(idea_id, request, current_user, database)
@@ -111,9 +137,26 @@ async def add_comments_to_idea(
 )
 async def upload_idea_image(
     idea_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     # You should implement this function in your services module
-    return await services.upload_idea_image(idea_id, file, current_user, database)
+    return await services.upload_idea_image(
+        idea_id, file, current_user, database, background_tasks
+    )
+
+
+@router.get(
+    "/{idea_id}/images/{image_id}", status_code=status.HTTP_307_TEMPORARY_REDIRECT
+)
+async def get_idea_image(
+    idea_id: int,
+    image_id: int,
+    variant: Optional[str] = Query(None, description="thumb, web or original"),
+    database: AsyncSession = Depends(db.get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    url = await services.get_idea_image_url(idea_id, image_id, variant, current_user, database)
+    return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
@@ -1,13 +1,23 @@
-from fastapi import HTTPException, status
+from collections import Counter
+from datetime import datetime
+from fastapi import BackgroundTasks, HTTPException, status
 from typing import List
 from . import models
+from backend import db
 from backend.auth.models import User
-from sqlalchemy.orm import Session, joinedload
+from backend.core import cache
+from backend.core.image_store import get_image_store
+from backend.core.image_variants import IMAGE_VARIANTS, render_variant, variant_key
+from backend.core.outbox import record_event
+from backend.core.uploads import consume_upload
+from backend.core.websocket import idea_topic, publish_event, revoke_subscriptions, user_topic
+from sqlalchemy import select, delete, insert, update, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from starlette.concurrency import run_in_threadpool
 import logging
-import cloudinary
-from cloudinary import uploader
-import os
-from uuid import uuid4
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -15,19 +25,79 @@ load_dotenv()
 logger = logging.getLogger("idea_app")
 
 
+def _insert_ignoring_conflicts(database: AsyncSession, model):
+    # ON CONFLICT DO NOTHING is dialect specific; SQLite only backs the tests
+    dialect = sqlite if database.get_bind().dialect.name == "sqlite" else postgresql
+    return dialect.insert(model).on_conflict_do_nothing()
+
+
+async def _resolve_tags(database: AsyncSession, tag_names, user_id) -> List[models.Tag]:
+    """
+    Maps tag names to the user's Tag rows with one SELECT for the existing
+    names and one INSERT ... ON CONFLICT DO NOTHING RETURNING for the rest.
+    """
+    names = list(dict.fromkeys(tag_names))
+    if not names:
+        return []
+
+    result = await database.execute(
+        select(models.Tag).filter(models.Tag.user_id == user_id, models.Tag.name.in_(names))
+    )
+    tags_by_name = {tag.name: tag for tag in result.scalars()}
+
+    missing = [name for name in names if name not in tags_by_name]
+    if missing:
+        now = datetime.utcnow()
+        result = await database.execute(
+            _insert_ignoring_conflicts(database, models.Tag)
+            .values([
+                {"name": name, "user_id": user_id, "created_at": now, "updated_at": now}
+                for name in missing
+            ])
+            .returning(models.Tag)
+        )
+        tags_by_name.update({tag.name: tag for tag in result.scalars()})
+
+        missing = [name for name in names if name not in tags_by_name]
+        if missing:
+            # lost a race with a concurrent insert of the same names
+            result = await database.execute(
+                select(models.Tag).filter(models.Tag.user_id == user_id, models.Tag.name.in_(missing))
+            )
+            tags_by_name.update({tag.name: tag for tag in result.scalars()})
+
+    missing = [name for name in names if name not in tags_by_name]
+    if missing:
+        # tag names are unique across all users
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tag name already in use: {', '.join(missing)}",
+        )
+    return [tags_by_name[name] for name in names]
+
+
+async def _attach_tags(database: AsyncSession, idea: models.Idea, tags: List[models.Tag]):
+    """Links tags to an idea with a single multi-row insert into idea_tags."""
+    if tags:
+        await database.execute(
+            insert(models.IdeaTag),
+            [{"idea_id": idea.id, "tag_id": tag.id} for tag in tags],
+        )
+    set_committed_value(idea, "tags", tags)
+
+
 async def create_new_idea(
-    request, database: Session, current_user: User
+    request, database: AsyncSession, current_user: User
 ) -> models.Idea:
     try:
         # error if the same idea has been added by the same user
-        existing_idea = (
-            database.query(models.Idea)
-            .filter(
+        result = await database.execute(
+            select(models.Idea).filter(
                 models.Idea.title == request.title,
                 models.Idea.user_id == current_user.id,
             )
-            .first()
         )
+        existing_idea = result.scalars().first()
         if existing_idea:
             # Log this specific error, potentially with the user ID
             logger.warning(
@@ -48,30 +118,33 @@ async def create_new_idea(
             user_id=current_user.id,
         )
 
+        database.add(new_idea)
+        await database.flush()  # Ensure new_idea.id is available
+
         # Handle tags if provided
         tags = getattr(request, "tags", None)
         if tags and isinstance(tags, list):
-            for tag_name in tags:
-                tag = (
-                    database.query(models.Tag)
-                    .filter_by(name=tag_name, user_id=current_user.id)
-                    .first()
-                )
-                if not tag:
-                    tag = models.Tag(name=tag_name, user_id=current_user.id)
-                    database.add(tag)
-                    database.flush()  # Ensure tag.id is available
-                new_idea.tags.append(tag)
-
-        database.add(new_idea)
-        database.commit()
-        database.refresh(new_idea)
+            tags = await _resolve_tags(database, tags, current_user.id)
+        else:
+            tags = []
+        await _attach_tags(database, new_idea, tags)
+
+        record_event(database, "idea.created", {
+            "id": new_idea.id,
+            "user_id": new_idea.user_id,
+            **_live_fields(new_idea),
+        })
+        await database.commit()
+        await cache.invalidate(
+            cache.ideas_namespace(current_user.id),
+            *([cache.tags_namespace(current_user.id)] if tags else []),
+        )
         return new_idea
     except HTTPException as http_exc:
         # Re-raise HTTPExceptions as they are handled by FastAPI's error handlers
         raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         # Log the error with relevant information
         logger.error(
             "Error creating idea for user ID %s: %s",
@@ -86,9 +159,28 @@ async def create_new_idea(
         )
 
 
+# Keyset order for the cursor listings; id breaks ties between equal timestamps
+IDEA_KEYSET_ORDER = (models.Idea.created_at.desc(), models.Idea.id.desc())
+
+
+def _idea_relations():
+    # Everything IdeaList serializes, loaded with one IN (...) query per
+    # relationship for the whole page rather than per row. selectinload also
+    # avoids the row explosion joinedload gives with several collections.
+    return (
+        selectinload(models.Idea.tags),
+        selectinload(models.Idea.scripts),
+        selectinload(models.Idea.comments).selectinload(models.IdeaComment.user),
+    )
+
+
 async def get_idea_listing(database, current_user) -> List[models.Idea]:
     try:
-        query = database.query(models.Idea).filter(models.Idea.user_id == current_user)
+        query = (
+            select(models.Idea)
+            .options(*_idea_relations())
+            .filter(models.Idea.user_id == current_user)
+        )
         return query
     except Exception as e:
         logger.error(
@@ -114,7 +206,11 @@ async def get_shared_idea_listing(database, current_user) -> List[models.Idea]:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not authenticated.",
             )
-        query = database.query(models.Idea).filter(models.Idea.is_shared == 1)
+        query = (
+            select(models.Idea)
+            .options(*_idea_relations())
+            .filter(models.Idea.is_shared == 1)
+        )
         return query
     except HTTPException as http_exc:
         raise http_exc
@@ -134,16 +230,12 @@ async def get_shared_idea_listing(database, current_user) -> List[models.Idea]:
 
 async def get_idea_by_id(idea_id, current_user, database):
     try:
-        idea = (
-            database.query(models.Idea)
-            .options(
-                joinedload(models.Idea.comments).joinedload(models.IdeaComment.user),
-                joinedload(models.Idea.tags),
-                joinedload(models.Idea.scripts),
-            )
+        result = await database.execute(
+            select(models.Idea)
+            .options(*_idea_relations())
             .filter_by(id=idea_id, user_id=current_user)
-            .first()
         )
+        idea = result.scalars().first()
         if not idea:
             logger.warning(
                 "Idea ID %s not found for user ID %s",
@@ -174,16 +266,39 @@ async def get_idea_by_id(idea_id, current_user, database):
         )
 
 
+def _live_fields(idea: models.Idea) -> dict:
+    # what idea.updated events carry, compared before and after an update
+    return {
+        "title": idea.title,
+        "description": idea.description,
+        "status": idea.status,
+        "is_shared": idea.is_shared,
+        "tags": [tag.name for tag in idea.tags],
+    }
+
+
+async def can_view_idea(idea_id: int, user_id: int, database: AsyncSession) -> bool:
+    """Whether the user owns the idea or it is shared."""
+    result = await database.execute(
+        select(models.Idea.id).filter(
+            models.Idea.id == idea_id,
+            or_(models.Idea.user_id == user_id, models.Idea.is_shared == 1),
+        )
+    )
+    return result.first() is not None
+
+
 async def update_idea_by_id(
-    idea_id, request, current_user: User, database: Session
+    idea_id, request, current_user: User, database: AsyncSession
 ) -> models.Idea:
     try:
         # check if idea belongs to the user
-        idea = (
-            database.query(models.Idea)
+        result = await database.execute(
+            select(models.Idea)
+            .options(selectinload(models.Idea.tags))
             .filter_by(id=idea_id, user_id=current_user.id)
-            .first()
         )
+        idea = result.scalars().first()
         if not idea:
             logger.warning(
                 "Attempt to update non-existent or unauthorized idea ID %s by user ID %s",
@@ -195,6 +310,9 @@ async def update_idea_by_id(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Idea Not Found!"
             )
 
+        was_shared = idea.is_shared == 1
+        before = _live_fields(idea)
+
         # update idea details
         idea.title = request.title or idea.title
         idea.description = request.description or idea.description
@@ -208,30 +326,39 @@ async def update_idea_by_id(
 
         # update tags if provided
         if hasattr(request, "tags") and isinstance(request.tags, list):
+            tags = await _resolve_tags(database, request.tags, current_user.id)
             # clear existing tags
-            idea.tags.clear()
-            for tag_name in request.tags:
-                tag = (
-                    database.query(models.Tag)
-                    .filter_by(name=tag_name, user_id=current_user.id)
-                    .first()
-                )
-                if not tag:
-                    tag = models.Tag(name=tag_name, user_id=current_user.id)
-                    database.add(tag)
-                    database.flush()
-
-                idea.tags.append(tag)
-
-        database.commit()
-        database.refresh(idea)
+            await database.execute(
+                delete(models.IdeaTag).where(models.IdeaTag.idea_id == idea.id)
+            )
+            await _attach_tags(database, idea, tags)
+
+        # only what changed goes into the event and to sockets watching this idea
+        changes = {
+            field: value for field, value in _live_fields(idea).items() if before[field] != value
+        }
+        if changes:
+            record_event(database, "idea.updated", {"id": idea.id, "user_id": idea.user_id, **changes})
+        await database.commit()
+        namespaces = [cache.ideas_namespace(current_user.id)]
+        if was_shared or idea.is_shared == 1:
+            namespaces.append(cache.SHARED_IDEAS_NAMESPACE)
+        if isinstance(getattr(request, "tags", None), list):
+            namespaces.append(cache.tags_namespace(current_user.id))
+        await cache.invalidate(*namespaces)
+
+        if changes:
+            await publish_event(idea_topic(idea.id), "idea.updated", {"id": idea.id, **changes})
+        if was_shared and idea.is_shared == 0:
+            # only the owner may still watch it
+            await revoke_subscriptions(idea_topic(idea.id), keep_user_id=idea.user_id)
         return idea
 
     except HTTPException as http_exc:
         raise http_exc
 
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         logger.error(
             "Error updating idea ID %s for user ID %s: %s",
             idea_id,
@@ -246,14 +373,13 @@ async def update_idea_by_id(
         )
 
 
-async def delete_idea_by_id(idea_id, current_user: User, database: Session):
+async def delete_idea_by_id(idea_id, current_user: User, database: AsyncSession):
     try:
         # check if idea belongs to the user
-        idea = (
-            database.query(models.Idea)
-            .filter_by(id=idea_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.Idea).filter_by(id=idea_id, user_id=current_user.id)
         )
+        idea = result.scalars().first()
         if not idea:
             logger.warning(
                 "Attempt to delete non-existent or unauthorized idea ID %s by user ID %s",
@@ -264,14 +390,32 @@ async def delete_idea_by_id(idea_id, current_user: User, database: Session):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Idea Not Found!"
             )
-        database.query(models.Idea).filter(models.Idea.id == idea_id).delete()
-        database.commit()
+        # scripts on the idea go with it, and may belong to other users
+        result = await database.execute(
+            select(models.IdeaScript.user_id)
+            .filter(models.IdeaScript.idea_id == idea.id)
+            .distinct()
+        )
+        script_user_ids = result.scalars().all()
+
+        released_blob_ids = await _release_idea_images(database, idea.id)
+        await database.execute(delete(models.Idea).where(models.Idea.id == idea_id))
+        record_event(database, "idea.deleted", {"id": idea.id, "user_id": idea.user_id})
+        await database.commit()
+        await _sweep_image_blobs(released_blob_ids)
+        await cache.invalidate(
+            cache.ideas_namespace(current_user.id),
+            *([cache.SHARED_IDEAS_NAMESPACE] if idea.is_shared == 1 else []),
+            *(cache.scripts_namespace(user_id) for user_id in script_user_ids),
+        )
+        await publish_event(idea_topic(idea.id), "idea.deleted", {"id": idea.id})
+        await revoke_subscriptions(idea_topic(idea.id))
 
     except HTTPException as http_exc:
         raise http_exc
 
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         logger.error(
             "Error deleting idea ID %s for user ID %s: %s",
             idea_id,
@@ -287,11 +431,12 @@ async def delete_idea_by_id(idea_id, current_user: User, database: Session):
 
 
 async def add_comments_to_idea(
-    idea_id: int, request, current_user: User, database: Session
+    idea_id: int, request, current_user: User, database: AsyncSession
 ) -> models.IdeaComment:
     try:
         # check if idea belongs to the user
-        idea = database.query(models.Idea).filter_by(id=idea_id).first()
+        result = await database.execute(select(models.Idea).filter_by(id=idea_id))
+        idea = result.scalars().first()
         if not idea:
             logger.warning(
                 "Attempt to add comment to non-existent idea ID %s",
@@ -323,15 +468,32 @@ async def add_comments_to_idea(
         )
 
         database.add(new_comment)
-        database.commit()
-        database.refresh(new_comment)
+        await database.flush()  # Ensure new_comment.id is available
+
+        comment = {
+            "id": new_comment.id,
+            "idea_id": idea.id,
+            "user_id": current_user.id,
+            "content": new_comment.content,
+            "created_at": new_comment.created_at,
+        }
+        record_event(database, "comment.created", {**comment, "idea_owner_id": idea.user_id})
+        await database.commit()
+        # comments are only allowed on shared ideas
+        await cache.invalidate(
+            cache.ideas_namespace(idea.user_id), cache.SHARED_IDEAS_NAMESPACE
+        )
+
+        await publish_event(idea_topic(idea.id), "comment.created", comment)
+        if idea.user_id != current_user.id:
+            await publish_event(user_topic(idea.user_id), "comment.created", comment)
         return new_comment
 
     except HTTPException as http_exc:
         raise http_exc
 
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         logger.error(
             "Error adding comment to idea ID %s by user ID %s: %s",
             idea_id,
@@ -346,19 +508,206 @@ async def add_comments_to_idea(
         )
     
 
+async def _acquire_image_blob(database: AsyncSession, file, upload):
+    """
+    Takes one more reference on the blob holding these bytes, storing them
+    first when no blob has them yet. Returns the blob's id, storage_key and
+    url. Racing uploads of new bytes both store them (same key) and the
+    insert that loses the race is ignored. A blob revived from ref_count 0
+    may have lost its bytes to a sweep that failed to commit, so its bytes
+    are stored again and its variants rendered afresh.
+    """
+    stored = None
+    for _ in range(2):
+        result = await database.execute(
+            update(models.ImageBlob)
+            .where(models.ImageBlob.sha256 == upload.sha256)
+            .values(ref_count=models.ImageBlob.ref_count + 1)
+            .returning(
+                models.ImageBlob.id,
+                models.ImageBlob.storage_key,
+                models.ImageBlob.url,
+                models.ImageBlob.ref_count,
+            )
+        )
+        blob = result.first()
+        if blob is not None:
+            if blob.ref_count == 1 and stored is None:
+                await database.execute(
+                    delete(models.ImageVariant).where(models.ImageVariant.blob_id == blob.id)
+                )
+                await get_image_store().save(file, upload)
+            return blob
+        stored = await get_image_store().save(file, upload)
+        await database.execute(
+            _insert_ignoring_conflicts(database, models.ImageBlob).values(
+                sha256=stored.sha256,
+                storage_key=stored.key,
+                url=stored.url,
+                size=stored.size,
+                ref_count=0,
+                created_at=datetime.utcnow(),
+            )
+        )
+    raise RuntimeError(f"Image blob {upload.sha256} vanished while it was being stored.")
+
+
+async def _release_idea_images(database: AsyncSession, idea_id) -> List[int]:
+    """
+    Deletes the idea's images and drops their blob references. Blobs left
+    with no references stay behind at ref_count 0 and their ids are
+    returned; the caller hands them to _sweep_image_blobs once this
+    transaction has committed, so a rollback never costs stored bytes.
+    """
+    result = await database.execute(
+        select(models.IdeaImage.blob_id).filter(
+            models.IdeaImage.idea_id == idea_id, models.IdeaImage.blob_id.isnot(None)
+        )
+    )
+    references = Counter(result.scalars().all())
+    await database.execute(delete(models.IdeaImage).where(models.IdeaImage.idea_id == idea_id))
+    if not references:
+        return []
+    for blob_id, count in references.items():
+        await database.execute(
+            update(models.ImageBlob)
+            .where(models.ImageBlob.id == blob_id)
+            .values(ref_count=models.ImageBlob.ref_count - count)
+        )
+    result = await database.execute(
+        select(models.ImageBlob.id).where(
+            models.ImageBlob.id.in_(references), models.ImageBlob.ref_count == 0
+        )
+    )
+    return result.scalars().all()
+
+
+async def _sweep_image_blobs(blob_ids):
+    """
+    Deletes the given blobs that are still unreferenced, with their variants
+    and stored bytes. It runs in its own short transaction that locks those
+    rows before touching storage: an upload of the same content waits on
+    the lock and then stores the bytes again instead of pointing at bytes
+    that are being removed. If the commit fails after the bytes are gone,
+    the rows stay at ref_count 0 and _acquire_image_blob restores the bytes
+    when it revives them; until then they only cost a row.
+    """
+    if not blob_ids:
+        return
+    async with db.AsyncSessionLocal() as database:
+        try:
+            result = await database.execute(
+                select(models.ImageBlob.id)
+                .where(models.ImageBlob.id.in_(blob_ids), models.ImageBlob.ref_count == 0)
+                .with_for_update()
+            )
+            unreferenced = result.scalars().all()
+            if not unreferenced:
+                return
+            result = await database.execute(
+                delete(models.ImageVariant)
+                .where(models.ImageVariant.blob_id.in_(unreferenced))
+                .returning(models.ImageVariant.storage_key)
+            )
+            variant_keys = [key for key in result.scalars().all() if key]
+            result = await database.execute(
+                delete(models.ImageBlob)
+                .where(models.ImageBlob.id.in_(unreferenced))
+                .returning(models.ImageBlob.storage_key)
+            )
+            await _delete_stored_images(variant_keys + result.scalars().all())
+            await database.commit()
+        except Exception as e:
+            await database.rollback()
+            logger.warning("Could not sweep image blobs %s: %s", blob_ids, str(e))
+
+
+async def _delete_stored_images(keys):
+    store = get_image_store()
+    for key in keys:
+        try:
+            await store.delete(key)
+        except Exception as e:
+            # an orphaned object only costs storage
+            logger.warning("Could not delete stored image %s: %s", key, str(e))
+
+
+async def generate_image_variants(blob_id: int):
+    """
+    Background job run after an upload: records every IMAGE_VARIANTS entry
+    the blob is still missing, rendering and storing it unless the store
+    derives variants itself. Safe to run more than once for the same blob.
+    """
+    store = get_image_store()
+    async with db.AsyncSessionLocal() as database:
+        try:
+            result = await database.execute(
+                select(models.ImageBlob)
+                .options(selectinload(models.ImageBlob.variants))
+                .filter(models.ImageBlob.id == blob_id)
+            )
+            blob = result.scalars().first()
+            if blob is None:
+                return
+            existing = {variant.variant for variant in blob.variants}
+            original = None
+            rows = []
+            for name, (width, height) in IMAGE_VARIANTS.items():
+                if name in existing:
+                    continue
+                if store.derives_variants:
+                    rows.append({"variant": name, "url": store.variant_url(blob.storage_key, width, height)})
+                    continue
+                if original is None:
+                    original = await store.read(blob.storage_key)
+                data, rendered_width, rendered_height = await run_in_threadpool(
+                    render_variant, original, (width, height)
+                )
+                key = variant_key(blob.storage_key, name)
+                rows.append({
+                    "variant": name,
+                    "storage_key": key,
+                    "url": await store.put(key, data),
+                    "width": rendered_width,
+                    "height": rendered_height,
+                    "size": len(data),
+                })
+            if not rows:
+                return
+            now = datetime.utcnow()
+            await database.execute(
+                _insert_ignoring_conflicts(database, models.ImageVariant),
+                [
+                    {"storage_key": None, "width": None, "height": None, "size": None, **row,
+                     "blob_id": blob_id, "created_at": now}
+                    for row in rows
+                ],
+            )
+            await database.commit()
+        except Exception as e:
+            await database.rollback()
+            logger.error(
+                "Error generating variants for image blob ID %s: %s",
+                blob_id,
+                str(e),
+                exc_info=True,
+                extra={"object_id": blob_id},
+            )
+
+
 async def upload_idea_image(
     idea_id: int,
     file,
     current_user: User,
-    database: Session,
+    database: AsyncSession,
+    background_tasks: BackgroundTasks,
 ):
     try:
         # Check if idea exists and belongs to user
-        idea = (
-            database.query(models.Idea)
-            .filter_by(id=idea_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.Idea).filter_by(id=idea_id, user_id=current_user.id)
         )
+        idea = result.scalars().first()
         if not idea:
             logger.warning(
                 "Attempt to upload image to non-existent or unauthorized idea ID %s by user ID %s",
@@ -370,58 +719,38 @@ async def upload_idea_image(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Idea Not Found!"
             )
 
-        # Read file content
-        contents = await file.read()
-        if not contents:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Uploaded file is empty.",
-            )
-
-        # Save file to disk or cloud (example: local 'uploads' folder)
+        # Hash and size-check the upload chunk by chunk; bytes we already
+        # hold are never stored or transferred again
+        upload = await consume_upload(file)
+        blob = await _acquire_image_blob(database, file, upload)
 
-        uploads_dir = "uploads"
-        os.makedirs(uploads_dir, exist_ok=True)
-        ext = os.path.splitext(file.filename)[1]
-        filename = f"{uuid4().hex}{ext}"
-        file_path = os.path.join(uploads_dir, filename)
-
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        # Upload to Cloudinary
-        cloudinary.config(
-            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-            api_key=os.getenv("CLOUDINARY_API_KEY"),
-            api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-        )
-        upload_result = uploader.upload(
-            file_path, public_id=f"idea_images/{filename}"
-        )
-        cloudinary_url = upload_result.get("secure_url")
-        if not cloudinary_url:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to upload image to Cloudinary.",
-            )
         # Create IdeaImage record
         idea_image = models.IdeaImage(
             idea_id=idea_id,
-            cloudinary_url=cloudinary_url,
-            image_name=filename,
-            image_type=file.content_type or "image/jpeg",
+            blob_id=blob.id,
+            cloudinary_url=blob.url,
+            image_name=blob.storage_key,
+            image_type=upload.content_type,
             description=f"Image uploaded by user {current_user.id} for idea {idea_id}",
         )
         database.add(idea_image)
-        database.commit()
-        database.refresh(idea_image)
-
-        return {"filename": filename, "message": "Image uploaded successfully."}
+        await database.commit()
+        # thumbnails and web sizes are rendered after the response is sent
+        background_tasks.add_task(generate_image_variants, blob.id)
+
+        return {
+            "id": idea_image.id,
+            "filename": blob.storage_key,
+            "url": blob.url,
+            "sha256": upload.sha256,
+            "size": upload.size,
+            "message": "Image uploaded successfully.",
+        }
 
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         logger.error(
             "Error uploading image to idea ID %s for user ID %s: %s",
             idea_id,
@@ -436,3 +765,35 @@ async def upload_idea_image(
         )
 
 
+async def get_idea_image_url(
+    idea_id: int, image_id: int, variant, current_user, database: AsyncSession
+) -> str:
+    """
+    URL of an idea image, or of one of its IMAGE_VARIANTS when asked for.
+    Falls back to the original while a variant is still being generated.
+    """
+    if variant is not None and variant != "original" and variant not in IMAGE_VARIANTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown image variant '{variant}'.",
+        )
+    result = await database.execute(
+        select(models.IdeaImage)
+        .join(models.Idea)
+        .options(selectinload(models.IdeaImage.blob).selectinload(models.ImageBlob.variants))
+        .filter(
+            models.IdeaImage.id == image_id,
+            models.IdeaImage.idea_id == idea_id,
+            or_(models.Idea.user_id == current_user.id, models.Idea.is_shared == 1),
+        )
+    )
+    image = result.scalars().first()
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Image Not Found!"
+        )
+    if image.blob is not None:
+        for rendition in image.blob.variants:
+            if rendition.variant == variant:
+                return rendition.url
+    return image.cloudinary_url
@@ -0,0 +1,62 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from backend import db
+from backend.auth.jwt import token_cache
+from backend.core.cache import get_cache_stats
+from backend.core.outbox import get_relay
+from backend.core.pool_metrics import get_pool_stats
+from backend.core.websocket import manager
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Shared secret callers send as X-Internal-Token; unset disables the endpoints
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "")
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    if not INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_internal_token is None or not secrets.compare_digest(x_internal_token, INTERNAL_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token")
+
+
+router = APIRouter(
+    tags=["Internal"],
+    prefix="/internal",
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/db/pool", status_code=status.HTTP_200_OK)
+async def db_pool_stats():
+    return {
+        "sync": get_pool_stats(db.engine),
+        "async": get_pool_stats(db.async_engine),
+    }
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_stats():
+    return get_cache_stats()
+
+
+@router.get("/auth/token-cache", status_code=status.HTTP_200_OK)
+async def token_cache_stats():
+    return token_cache.stats()
+
+
+@router.get("/ws", status_code=status.HTTP_200_OK)
+async def websocket_stats():
+    return manager.stats()
+
+
+@router.get("/outbox", status_code=status.HTTP_200_OK)
+async def outbox_stats():
+    relay = get_relay()
+    return relay.stats() if relay is not None else {"running": False}
@@ -1,5 +1,8 @@
 # backend/middleware.py
 import time
+import uuid
+
+from backend.core.log_context import begin_request, end_request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
@@ -11,8 +14,15 @@ class TimingMiddleware(BaseHTTPMiddleware):
 
     async def dispatch(self, request: Request, call_next):
         start_time = time.time()
-        response = await call_next(request)
+        # a request id from the caller (or a proxy) is kept so logs can be joined across services
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        token = begin_request(request_id)
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(token)
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(process_time)
+        response.headers["X-Request-ID"] = request_id
         print(f"Request: {request.method} {request.url.path} - Process Time: {process_time:.4f}s")
         return response
\ No newline at end of file
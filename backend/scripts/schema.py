@@ -7,6 +7,9 @@ class ScriptBase(BaseModel):
     title: str
     script_content: str
 
+    class Config:
+        from_attributes = True
+
 
 class ScriptList(ScriptBase):
-    user_id: int
\ No newline at end of file
+    user_id: int
@@ -2,22 +2,48 @@ from fastapi import HTTPException, status
 from typing import List
 from backend.ideas import models
 from backend.auth.models import User
-from sqlalchemy.orm import Session
+from backend.core import cache
+from backend.core.outbox import record_event
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _script_event(script: models.IdeaScript) -> dict:
+    return {
+        "id": script.id,
+        "idea_id": script.idea_id,
+        "user_id": script.user_id,
+        "title": script.title,
+        "script_content": script.script_content,
+    }
+
+
+async def _invalidate_script_views(database: AsyncSession, idea_id, user_id):
+    # scripts are also rendered inside their idea, which may be shared
+    namespaces = [cache.scripts_namespace(user_id)]
+    result = await database.execute(
+        select(models.Idea.user_id, models.Idea.is_shared).filter(models.Idea.id == idea_id)
+    )
+    idea = result.first()
+    if idea:
+        namespaces.append(cache.ideas_namespace(idea.user_id))
+        if idea.is_shared == 1:
+            namespaces.append(cache.SHARED_IDEAS_NAMESPACE)
+    await cache.invalidate(*namespaces)
 
 
 async def create_new_script(
-    request, database: Session, current_user: User
+    request, database: AsyncSession, current_user: User
 ) -> models.IdeaScript:
     try:
         # check for script count
-        script_count = (
-            database.query(models.IdeaScript)
-            .filter(
+        result = await database.execute(
+            select(func.count(models.IdeaScript.id)).filter(
                 models.IdeaScript.idea_id == request.idea_id,
                 models.IdeaScript.user_id == current_user.id,
             )
-            .count()
         )
+        script_count = result.scalar_one()
         if script_count >= 3:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,19 +57,20 @@ async def create_new_script(
             user_id=current_user.id,
         )
         database.add(new_script)
-        database.commit()
-        database.refresh(new_script)
+        await database.flush()  # Ensure new_script.id is available
+        record_event(database, "script.created", _script_event(new_script))
+        await database.commit()
+        await database.refresh(new_script)
+        await _invalidate_script_views(database, new_script.idea_id, current_user.id)
         return new_script
 
     except HTTPException as http_exc:
-
-        print(f"HTTP Exception caught: Status {http_exc.status_code}, Detail: {http_exc.detail}")
-        database.rollback()
+        await database.rollback()
         raise http_exc
 
     except Exception as e:
         print(f"Error creating script: {str(e)}")
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while creating the script: {str(e)}",
@@ -52,11 +79,10 @@ async def create_new_script(
 
 async def get_script_listing(database, current_user) -> List[models.IdeaScript]:
     try:
-        scripts = (
-            database.query(models.IdeaScript)
-            .filter(models.IdeaScript.user_id == current_user)
-            .all()
+        result = await database.execute(
+            select(models.IdeaScript).filter(models.IdeaScript.user_id == current_user)
         )
+        scripts = result.scalars().all()
         return scripts
     except Exception as e:
         raise HTTPException(
@@ -67,16 +93,17 @@ async def get_script_listing(database, current_user) -> List[models.IdeaScript]:
 
 async def get_script_by_id(script_id, current_user, database):
     try:
-        script = (
-            database.query(models.IdeaScript)
-            .filter_by(id=script_id, user_id=current_user)
-            .first()
+        result = await database.execute(
+            select(models.IdeaScript).filter_by(id=script_id, user_id=current_user)
         )
+        script = result.scalars().first()
         if not script:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Script Not Found!"
             )
         return script
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -85,15 +112,14 @@ async def get_script_by_id(script_id, current_user, database):
 
 
 async def update_script_by_id(
-    script_id, request, current_user: User, database: Session
+    script_id, request, current_user: User, database: AsyncSession
 ) -> models.IdeaScript:
     try:
         # check if script belongs to the user
-        script = (
-            database.query(models.IdeaScript)
-            .filter_by(id=script_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.IdeaScript).filter_by(id=script_id, user_id=current_user.id)
         )
+        script = result.scalars().first()
         if not script:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Script Not Found!"
@@ -103,35 +129,44 @@ async def update_script_by_id(
         script.script_content = request.script_content or script.script_content
         script.title = request.title or script.title
 
-        database.commit()
-        database.refresh(script)
+        record_event(database, "script.updated", _script_event(script))
+        await database.commit()
+        await database.refresh(script)
+        await _invalidate_script_views(database, script.idea_id, current_user.id)
         return script
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while updating the script: {str(e)}",
         )
 
 
-async def delete_script_by_id(script_id, current_user: User, database: Session):
+async def delete_script_by_id(script_id, current_user: User, database: AsyncSession):
     try:
         # check if script belongs to the user
-        script = (
-            database.query(models.IdeaScript)
-            .filter_by(id=script_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.IdeaScript).filter_by(id=script_id, user_id=current_user.id)
         )
+        script = result.scalars().first()
         if not script:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Script Not Found!"
             )
-        database.query(models.IdeaScript).filter(
-            models.IdeaScript.id == script_id
-        ).delete()
-        database.commit()
+        await database.execute(
+            delete(models.IdeaScript).where(models.IdeaScript.id == script_id)
+        )
+        record_event(database, "script.deleted", {
+            "id": script.id, "idea_id": script.idea_id, "user_id": script.user_id,
+        })
+        await database.commit()
+        await _invalidate_script_views(database, script.idea_id, current_user.id)
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting the script: {str(e)}",
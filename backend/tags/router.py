@@ -1,10 +1,13 @@
 from typing import List
 from fastapi import APIRouter, Depends, status, Response
-from sqlalchemy.orm import Session
+from fastapi_cache.decorator import cache
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.auth.jwt import get_current_user
+from backend.auth.current_user import get_current_user_record
 from backend.auth.models import User
 
 from backend import db
+from backend.core.cache import user_key_builder
 
 from . import schema
 from . import services
@@ -16,21 +19,21 @@ router = APIRouter(tags=["Tag"], prefix="/api/tags")
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=schema.TagBase)
 async def create_new_tag(
     request: schema.TagBase,
-    database: Session = Depends(db.get_db),
-    current_user: User = Depends(get_current_user),
+    database: AsyncSession = Depends(db.get_async_db),
+    user: User = Depends(get_current_user_record),
 ):
-    user = database.query(User).filter(User.email == current_user.email).first()
     result = await services.create_new_tag(request, database, user)
     return result
 
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=List[schema.TagList])
+@cache(key_builder=user_key_builder("tags"))
 async def tag_list(
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     result = await services.get_tag_listing(database, current_user.id)
-    return result
+    return [schema.TagList.model_validate(item) for item in result]
 
 
 @router.get(
@@ -38,7 +41,7 @@ async def tag_list(
 )
 async def get_tag_by_id(
     tag_id: int,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.get_tag_by_id(tag_id, current_user.id, database)
@@ -49,7 +52,7 @@ async def get_tag_by_id(
 )
 async def delete_tag_by_id(
     tag_id: str,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.delete_tag_by_id(tag_id, current_user, database)
@@ -61,7 +64,7 @@ async def delete_tag_by_id(
 async def update_tag_by_id(
     tag_id: int,
     request: schema.TagUpdate,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.update_tag_by_id(tag_id, request, current_user, database)
@@ -7,6 +7,9 @@ class TagBase(BaseModel):
     name: str
     description: str
 
+    class Config:
+        from_attributes = True
+
 
 class TagUpdate(BaseModel):
     name: Optional[str] = None
@@ -23,6 +26,9 @@ class TagList(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    class Config:
+        from_attributes = True
+
 
 class UserSchema(BaseModel):
     username: str
@@ -2,22 +2,37 @@ from fastapi import HTTPException, status
 from typing import List
 from backend.ideas import models
 from backend.auth.models import User
-from sqlalchemy.orm import Session
+from backend.core import cache
+from backend.core.outbox import record_event
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _tag_event(tag: models.Tag) -> dict:
+    return {"id": tag.id, "user_id": tag.user_id, "name": tag.name, "description": tag.description}
+
+
+async def _invalidate_tag_views(user_id):
+    # tag names are also rendered inside the user's ideas, shared ones included
+    await cache.invalidate(
+        cache.tags_namespace(user_id),
+        cache.ideas_namespace(user_id),
+        cache.SHARED_IDEAS_NAMESPACE,
+    )
 
 
 async def create_new_tag(
-    request, database: Session, current_user: User
+    request, database: AsyncSession, current_user: User
 ) -> models.Tag:
     try:
         # error if the same tag has been added by the same user
-        existing_tag = (
-            database.query(models.Tag)
-            .filter(
+        result = await database.execute(
+            select(models.Tag).filter(
                 models.Tag.name == request.name,
                 models.Tag.user_id == current_user.id,
             )
-            .first()
         )
+        existing_tag = result.scalars().first()
         if existing_tag:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,12 +45,17 @@ async def create_new_tag(
             user_id=current_user.id,
         )
         database.add(new_tag)
-        database.commit()
-        database.refresh(new_tag)
+        await database.flush()  # Ensure new_tag.id is available
+        record_event(database, "tag.created", _tag_event(new_tag))
+        await database.commit()
+        await database.refresh(new_tag)
+        await cache.invalidate(cache.tags_namespace(current_user.id))
         return new_tag
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         print(f"Error creating tag: {str(e)}")
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while creating the tag: {str(e)}",
@@ -44,11 +64,10 @@ async def create_new_tag(
 
 async def get_tag_listing(database, current_user) -> List[models.Tag]:
     try:
-        tags = (
-            database.query(models.Tag)
-            .filter(models.Tag.user_id == current_user)
-            .all()
+        result = await database.execute(
+            select(models.Tag).filter(models.Tag.user_id == current_user)
         )
+        tags = result.scalars().all()
         return tags
     except Exception as e:
         raise HTTPException(
@@ -59,16 +78,17 @@ async def get_tag_listing(database, current_user) -> List[models.Tag]:
 
 async def get_tag_by_id(tag_id, current_user, database):
     try:
-        tag = (
-            database.query(models.Tag)
-            .filter_by(id=tag_id, user_id=current_user)
-            .first()
+        result = await database.execute(
+            select(models.Tag).filter_by(id=tag_id, user_id=current_user)
         )
+        tag = result.scalars().first()
         if not tag:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Tag Not Found!"
             )
         return tag
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -77,15 +97,14 @@ async def get_tag_by_id(tag_id, current_user, database):
     
 
 async def update_tag_by_id(
-    tag_id, request, current_user: User, database: Session
+    tag_id, request, current_user: User, database: AsyncSession
 ) -> models.Tag:
     try:
         # check if tag belongs to the user
-        tag = (
-            database.query(models.Tag)
-            .filter_by(id=tag_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.Tag).filter_by(id=tag_id, user_id=current_user.id)
         )
+        tag = result.scalars().first()
         if not tag:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Tag Not Found!"
@@ -95,33 +114,40 @@ async def update_tag_by_id(
         tag.name = request.name or tag.name
         tag.description = request.description or tag.description
 
-        database.commit()
-        database.refresh(tag)
+        record_event(database, "tag.updated", _tag_event(tag))
+        await database.commit()
+        await database.refresh(tag)
+        await _invalidate_tag_views(current_user.id)
         return tag
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while updating the tag: {str(e)}",
         )
 
 
-async def delete_tag_by_id(tag_id, current_user: User, database: Session):
+async def delete_tag_by_id(tag_id, current_user: User, database: AsyncSession):
     try:
         # check if tag belongs to the user
-        tag = (
-            database.query(models.Tag)
-            .filter_by(id=tag_id, user_id=current_user.id)
-            .first()
+        result = await database.execute(
+            select(models.Tag).filter_by(id=tag_id, user_id=current_user.id)
         )
+        tag = result.scalars().first()
         if not tag:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Tag Not Found!"
             )
-        database.query(models.Tag).filter(models.Tag.id == tag_id).delete()
-        database.commit()
+        await database.execute(delete(models.Tag).where(models.Tag.id == tag_id))
+        record_event(database, "tag.deleted", {"id": tag.id, "user_id": tag.user_id})
+        await database.commit()
+        await _invalidate_tag_views(current_user.id)
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        database.rollback()
+        await database.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while deleting the tag: {str(e)}",
@@ -1,13 +1,14 @@
 from typing import List
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlalchemy import paginate as sqlalchemy_paginate
+from fastapi_pagination.ext.sqlalchemy import apaginate as sqlalchemy_paginate
 
 from backend.auth.jwt import get_current_user
 from backend.auth.models import User
 
 from backend import db
+from backend.core.pagination import KeysetPage
 
 from backend.auth.schema import DisplayAccount
 from . import services
@@ -18,11 +19,20 @@ router = APIRouter(tags=["Users"], prefix="/api/users")
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=Page[DisplayAccount])
 async def user_list(
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     query = await services.get_user_listing(database, current_user.id)
-    return sqlalchemy_paginate(database, query)
+    return await sqlalchemy_paginate(database, query)
+
+
+@router.get("/cursor", status_code=status.HTTP_200_OK, response_model=KeysetPage[DisplayAccount])
+async def user_list_cursor(
+    database: AsyncSession = Depends(db.get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = await services.get_user_listing(database, current_user.id)
+    return await sqlalchemy_paginate(database, query.order_by(*services.USER_KEYSET_ORDER))
 
 
 @router.get(
@@ -30,7 +40,7 @@ async def user_list(
 )
 async def get_user_by_id(
     user_id: int,
-    database: Session = Depends(db.get_db),
+    database: AsyncSession = Depends(db.get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     return await services.get_user_by_id(user_id, current_user.id, database)
\ No newline at end of file
@@ -1,11 +1,15 @@
 from fastapi import HTTPException, status
 from typing import List
+from sqlalchemy import select
 from backend.auth.models import User
 
 
+USER_KEYSET_ORDER = (User.id,)
+
+
 async def get_user_listing(database, current_user) -> List[User]:
     try:
-        return database.query(User)
+        return select(User)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -15,11 +19,8 @@ async def get_user_listing(database, current_user) -> List[User]:
 
 async def get_user_by_id(user_id, current_user, database) -> User:
     try:
-        user = (
-            database.query(User)
-            .filter_by(id=user_id)
-            .first()
-        )
+        result = await database.execute(select(User).filter_by(id=user_id))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User Not Found!"
@@ -0,0 +1,284 @@
+# benchmarks/amqp_standin.py
+"""
+In-process stand-in for a RabbitMQ broker, covering the slice of the
+aio-pika API the app uses. It lets tests and benchmarks run the real
+publisher and consumer code without a broker. Every broker round trip
+(declares, publisher confirms) costs `round_trip` seconds so benchmarks
+reflect how many round trips the code makes. Acks and nacks are one-way,
+but the broker only sees them - and frees prefetch slots - one round
+trip later.
+"""
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+
+
+def topic_matches(pattern: str, routing_key: str) -> bool:
+    """AMQP topic matching: '*' is one dot-separated word, '#' zero or more."""
+    pattern_words, key_words = pattern.split("."), routing_key.split(".")
+
+    def match(i: int, j: int) -> bool:
+        if i == len(pattern_words):
+            return j == len(key_words)
+        if pattern_words[i] == "#":
+            return any(match(i + 1, k) for k in range(j, len(key_words) + 1))
+        if j == len(key_words):
+            return False
+        return pattern_words[i] in ("*", key_words[j]) and match(i + 1, j + 1)
+
+    return match(0, 0)
+
+
+class StandInBroker:
+    def __init__(self, round_trip: float = 0.0):
+        self.round_trip = round_trip
+        self.exchanges: Dict[str, "StandInExchange"] = {}
+        self.queues: Dict[str, "_QueueState"] = {}
+        self.round_trips = 0
+        self.channels_opened = 0
+        self.ack_frames = 0
+        self.nack_frames = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.round_trip:
+            await asyncio.sleep(self.round_trip)
+        else:
+            await asyncio.sleep(0)
+
+    def _later(self, callback, *args):
+        asyncio.get_running_loop().call_later(self.round_trip, callback, *args)
+
+    def route(self, exchange_name: str, routing_key: str, message):
+        if exchange_name == "":
+            # the default exchange routes straight to the queue of that name
+            if routing_key in self.queues:
+                self.queues[routing_key].enqueue(routing_key, message)
+            return
+        exchange = self.exchanges[exchange_name]
+        for queue_name, pattern in exchange.bindings:
+            if exchange.type == "fanout" or (
+                topic_matches(pattern, routing_key) if exchange.type == "topic" else pattern == routing_key
+            ):
+                self.queues[queue_name].enqueue(routing_key, message)
+
+    def connect(self) -> "StandInConnection":
+        return StandInConnection(self)
+
+
+class StandInConnection:
+    def __init__(self, broker: StandInBroker):
+        self.broker = broker
+        self.is_closed = False
+
+    async def channel(self, publisher_confirms: bool = True) -> "StandInChannel":
+        await self.broker._round_trip()
+        self.broker.channels_opened += 1
+        return StandInChannel(self.broker)
+
+    async def close(self):
+        self.is_closed = True
+
+
+class StandInChannel:
+    def __init__(self, broker: StandInBroker):
+        self.broker = broker
+        self.is_closed = False
+        self.prefetch_count = 0
+        self.unacked: Dict[int, "StandInIncomingMessage"] = {}
+        self._tags = itertools.count(1)
+        self._consumers: Dict[str, tuple] = {}
+        self._consumer_tags = itertools.count(1)
+        self.default_exchange = StandInExchange(broker, "", "direct")
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs):
+        await self.broker._round_trip()
+        self.prefetch_count = prefetch_count
+
+    async def declare_exchange(self, name: str, type="direct", *, durable: bool = False, **kwargs):
+        await self.broker._round_trip()
+        type = getattr(type, "value", type)
+        exchange = self.broker.exchanges.setdefault(name, StandInExchange(self.broker, name, type))
+        return exchange
+
+    async def get_exchange(self, name: str, *, ensure: bool = True):
+        if ensure:
+            await self.broker._round_trip()
+        return self.broker.exchanges[name]
+
+    async def declare_queue(self, name: str, *, durable: bool = False, arguments: Optional[dict] = None, **kwargs):
+        await self.broker._round_trip()
+        state = self.broker.queues.setdefault(name, _QueueState(self.broker, name, arguments or {}))
+        return StandInQueue(self, state)
+
+    def _dispatch(self):
+        if self.is_closed:
+            return
+        loop = asyncio.get_running_loop()
+        for state, callback in self._consumers.values():
+            while state.messages and (not self.prefetch_count or len(self.unacked) < self.prefetch_count):
+                routing_key, message, redelivered = state.pop()
+                incoming = StandInIncomingMessage(self, next(self._tags), state, routing_key, message, redelivered)
+                self.unacked[incoming.delivery_tag] = incoming
+                loop.create_task(callback(incoming))
+
+    def _settle(self, delivery_tag: int, multiple: bool, requeue: Optional[bool]):
+        # requeue None means ack; True puts the message back, False dead-letters it
+        if multiple:
+            tags = [tag for tag in self.unacked if tag <= delivery_tag]
+        else:
+            tags = [delivery_tag] if delivery_tag in self.unacked else []
+        for tag in tags:
+            incoming = self.unacked.pop(tag)
+            if requeue:
+                incoming.queue.requeue(incoming.routing_key, incoming.message)
+            elif requeue is False:
+                incoming.queue.dead_letter(incoming.routing_key, incoming.message)
+        self._dispatch()
+
+    async def close(self):
+        self.is_closed = True
+        for state, _ in self._consumers.values():
+            if self in state.channels:
+                state.channels.remove(self)
+        self._consumers.clear()
+        # frames are handled in order, so acks sent before the close land first
+        self.broker._later(self._requeue_unacked)
+
+    def _requeue_unacked(self):
+        # unacked deliveries go back to their queues, like on a real broker
+        for tag in sorted(self.unacked, reverse=True):
+            incoming = self.unacked.pop(tag)
+            incoming.queue.requeue(incoming.routing_key, incoming.message)
+
+
+class StandInExchange:
+    def __init__(self, broker: StandInBroker, name: str, type: str):
+        self.broker = broker
+        self.name = name
+        self.type = type
+        self.bindings: List[tuple] = []
+
+    async def publish(self, message, routing_key: str, **kwargs):
+        # the confirm arrives one round trip later; concurrent publishes overlap
+        await self.broker._round_trip()
+        self.broker.route(self.name, routing_key, message)
+
+
+class _QueueState:
+    def __init__(self, broker: StandInBroker, name: str, arguments: dict):
+        self.broker = broker
+        self.name = name
+        self.arguments = arguments
+        self.messages: List[tuple] = []
+        self.redelivered: set = set()
+        self.channels: List[StandInChannel] = []
+
+    def enqueue(self, routing_key: str, message):
+        entry = (routing_key, message)
+        self.messages.append(entry)
+        ttl = self.arguments.get("x-message-ttl")
+        if ttl is not None:
+            asyncio.get_running_loop().call_later(ttl / 1000, self._expire, entry)
+        self._notify()
+
+    def _expire(self, entry):
+        # a message still waiting when its TTL runs out is dead-lettered
+        for i, queued in enumerate(self.messages):
+            if queued is entry:
+                del self.messages[i]
+                self.dead_letter(*entry)
+                return
+
+    def requeue(self, routing_key: str, message):
+        # like RabbitMQ, a requeued message goes back to the head of the queue
+        self.messages.insert(0, (routing_key, message))
+        self.redelivered.add(id(message))
+        self._notify()
+
+    def pop(self):
+        routing_key, message = self.messages.pop(0)
+        redelivered = id(message) in self.redelivered
+        self.redelivered.discard(id(message))
+        return routing_key, message, redelivered
+
+    def dead_letter(self, routing_key: str, message):
+        exchange = self.arguments.get("x-dead-letter-exchange")
+        if exchange is None:
+            return
+        routing_key = self.arguments.get("x-dead-letter-routing-key", routing_key)
+        self.broker.route(exchange, routing_key, message)
+
+    def _notify(self):
+        for channel in list(self.channels):
+            channel._dispatch()
+
+
+class StandInQueue:
+    def __init__(self, channel: StandInChannel, state: _QueueState):
+        self.channel = channel
+        self.state = state
+        self.name = state.name
+
+    @property
+    def messages(self) -> List[tuple]:
+        return self.state.messages
+
+    async def bind(self, exchange, routing_key: str = ""):
+        await self.channel.broker._round_trip()
+        name = getattr(exchange, "name", exchange)
+        bindings = self.channel.broker.exchanges[name].bindings
+        if (self.name, routing_key) not in bindings:
+            bindings.append((self.name, routing_key))
+
+    async def consume(self, callback, no_ack: bool = False, **kwargs) -> str:
+        await self.channel.broker._round_trip()
+        consumer_tag = f"ctag-{next(self.channel._consumer_tags)}"
+        self.channel._consumers[consumer_tag] = (self.state, callback)
+        self.state.channels.append(self.channel)
+        self.channel._dispatch()
+        return consumer_tag
+
+    async def get(self, *, no_ack: bool = False, fail: bool = True, **kwargs):
+        await self.channel.broker._round_trip()
+        if not self.state.messages:
+            if fail:
+                raise LookupError(f"queue {self.name} is empty")
+            return None
+        routing_key, message, redelivered = self.state.pop()
+        incoming = StandInIncomingMessage(
+            self.channel, next(self.channel._tags), self.state, routing_key, message, redelivered
+        )
+        if not no_ack:
+            self.channel.unacked[incoming.delivery_tag] = incoming
+        return incoming
+
+    async def cancel(self, consumer_tag: str, **kwargs):
+        await self.channel.broker._round_trip()
+        self.channel._consumers.pop(consumer_tag, None)
+        if self.channel in self.state.channels:
+            self.state.channels.remove(self.channel)
+
+
+class StandInIncomingMessage:
+    def __init__(self, channel: StandInChannel, delivery_tag: int, queue: _QueueState, routing_key: str, message, redelivered: bool):
+        self.channel = channel
+        self.delivery_tag = delivery_tag
+        self.queue = queue
+        self.routing_key = routing_key
+        self.message = message
+        self.redelivered = redelivered
+        self.body = message.body
+        self.headers = dict(message.headers or {})
+        self.message_id = getattr(message, "message_id", None)
+
+    async def ack(self, multiple: bool = False):
+        self.channel.broker.ack_frames += 1
+        self.channel.broker._later(self.channel._settle, self.delivery_tag, multiple, None)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True):
+        self.channel.broker.nack_frames += 1
+        self.channel.broker._later(self.channel._settle, self.delivery_tag, multiple, requeue)
+
+    async def reject(self, requeue: bool = False):
+        await self.nack(requeue=requeue)
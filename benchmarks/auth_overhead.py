@@ -0,0 +1,37 @@
+# benchmarks/auth_overhead.py
+"""
+Per-request cost of get_current_user with and without the verified-token
+cache. Run from the project root:
+
+    python benchmarks/auth_overhead.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.auth import jwt  # noqa: E402
+
+
+def run(iterations: int):
+    token = jwt.create_access_token(data={"sub": "bench@example.com", "id": 1})
+
+    jwt.token_cache.maxsize = 0
+    uncached = timeit.timeit(lambda: jwt.get_current_user(token), number=iterations)
+
+    jwt.token_cache.maxsize = jwt.TOKEN_CACHE_SIZE
+    jwt.token_cache.clear()
+    jwt.get_current_user(token)
+    cached = timeit.timeit(lambda: jwt.get_current_user(token), number=iterations)
+
+    print(f"iterations:        {iterations}")
+    print(f"decode + verify:   {uncached / iterations * 1e6:8.2f} us/request")
+    print(f"verified cache:    {cached / iterations * 1e6:8.2f} us/request")
+    print(f"speedup:           {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
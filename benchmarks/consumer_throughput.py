@@ -0,0 +1,93 @@
+# benchmarks/consumer_throughput.py
+"""
+Notification consumer throughput against the in-process stand-in broker,
+where every broker round trip costs a fixed latency and every handler call
+a fixed amount of work. Compares the old prefetch-1, one-at-a-time setup
+with the concurrent consumer, with and without ack batching, and with the
+batch handler API. Run from the project root:
+
+    python benchmarks/consumer_throughput.py [--messages N] [--work-ms MS] [--round-trip-ms MS]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.amqp_standin import StandInBroker  # noqa: E402
+from backend.core.consumer import (  # noqa: E402
+    CONSUMER_ACK_BATCH,
+    CONSUMER_BATCH_SIZE,
+    CONSUMER_CONCURRENCY,
+    CONSUMER_PREFETCH,
+    BatchConsumer,
+    NotificationConsumer,
+)
+from backend.core.rabbitmq import EXCHANGE_NAME, build_message  # noqa: E402
+
+
+async def measure(messages: int, work: float, round_trip: float, batched: bool = False, **options):
+    broker = StandInBroker(round_trip=round_trip)
+    finished = asyncio.Event()
+    handled = 0
+
+    def count(n):
+        nonlocal handled
+        handled += n
+        if handled == messages:
+            finished.set()
+
+    async def handler(routing_key, payload):
+        await asyncio.sleep(work)  # stands in for a database write or an HTTP call
+        count(1)
+
+    async def batch_handler(deliveries):
+        await asyncio.sleep(work)  # one multi-row write costs about as much as a single one
+        count(len(deliveries))
+
+    if batched:
+        consumer = BatchConsumer(broker.connect(), batch_handler, **options)
+    else:
+        consumer = NotificationConsumer(broker.connect(), handler, **options)
+    await consumer.start()
+    started = time.perf_counter()
+    for i in range(messages):
+        broker.route(EXCHANGE_NAME, "idea.created", build_message({"id": i}))
+    await finished.wait()
+    elapsed = time.perf_counter() - started
+    await consumer.stop()
+    return messages / elapsed, broker.ack_frames
+
+
+async def run(messages: int, work_ms: float, round_trip_ms: float):
+    print(f"messages: {messages}, handler work: {work_ms} ms, broker round trip: {round_trip_ms} ms")
+    for label, options in (
+        ("prefetch 1, one handler, ack each", dict(prefetch=1, concurrency=1, ack_batch=1)),
+        (
+            f"prefetch {CONSUMER_PREFETCH}, {CONSUMER_CONCURRENCY} handlers, ack each",
+            dict(ack_batch=1),
+        ),
+        (
+            f"prefetch {CONSUMER_PREFETCH}, {CONSUMER_CONCURRENCY} handlers, ack per {CONSUMER_ACK_BATCH}",
+            dict(),
+        ),
+        (
+            f"batches of {CONSUMER_BATCH_SIZE}, 4 handlers",
+            dict(batched=True, concurrency=4, prefetch=4 * CONSUMER_BATCH_SIZE),
+        ),
+    ):
+        rate, ack_frames = await measure(messages, work_ms / 1000, round_trip_ms / 1000, **options)
+        print(f"{label:44} {rate:10.0f} msg/s  {ack_frames:6d} ack frames")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--work-ms", type=float, default=5.0, help="simulated handler time per message")
+    parser.add_argument("--round-trip-ms", type=float, default=1.0, help="simulated broker latency")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.work_ms, args.round_trip_ms))
@@ -0,0 +1,91 @@
+# benchmarks/publisher_throughput.py
+"""
+Notification publish throughput against the in-process stand-in broker,
+where every broker round trip costs a fixed latency. Compares the old
+per-message path (new channel + exchange declare + publish) with the
+pooled NotificationPublisher, one message at a time and in confirm
+batches. Run from the project root:
+
+    python benchmarks/publisher_throughput.py [messages] [round_trip_ms]
+"""
+import asyncio
+import os
+import sys
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from benchmarks.amqp_standin import StandInBroker  # noqa: E402
+from backend.core.rabbitmq import (  # noqa: E402
+    EXCHANGE_NAME,
+    EXCHANGE_TYPE,
+    NotificationPublisher,
+    build_message,
+)
+
+BATCH_SIZE = 50
+CONCURRENCY = 16
+
+
+async def per_message(connection, messages):
+    async def publish(i):
+        channel = await connection.channel()
+        exchange = await channel.declare_exchange(EXCHANGE_NAME, EXCHANGE_TYPE, durable=True)
+        await exchange.publish(build_message({"id": i}), routing_key="idea.created")
+
+    await _concurrently(publish, messages)
+
+
+async def pooled(connection, messages):
+    publisher = NotificationPublisher(connection)
+    await _concurrently(lambda i: publisher.publish("idea.created", {"id": i}), messages)
+    await publisher.close()
+
+
+async def pooled_batches(connection, messages):
+    publisher = NotificationPublisher(connection)
+    for start in range(0, messages, BATCH_SIZE):
+        await publisher.publish_batch(
+            [("idea.created", {"id": i}) for i in range(start, min(start + BATCH_SIZE, messages))]
+        )
+    await publisher.close()
+
+
+async def _concurrently(publish, messages):
+    # CONCURRENCY request handlers publishing at once
+    ids = iter(range(messages))
+
+    async def worker():
+        for i in ids:
+            await publish(i)
+
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+
+
+async def measure(strategy, messages, round_trip):
+    broker = StandInBroker(round_trip=round_trip)
+    started = time.perf_counter()
+    await strategy(broker.connect(), messages)
+    elapsed = time.perf_counter() - started
+    return messages / elapsed, broker.round_trips
+
+
+def run(messages: int, round_trip_ms: float):
+    round_trip = round_trip_ms / 1000
+    print(f"messages: {messages}, round trip: {round_trip_ms} ms, concurrency: {CONCURRENCY}")
+    for label, strategy in (
+        ("channel + declare per message", per_message),
+        ("pooled channels", pooled),
+        (f"pooled, {BATCH_SIZE}-message confirm batches", pooled_batches),
+    ):
+        rate, trips = asyncio.run(measure(strategy, messages, round_trip))
+        print(f"{label:38} {rate:10.0f} msg/s  {trips:6d} round trips")
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 1.0,
+    )
@@ -1,52 +1,156 @@
 # logger_config.py
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
-# Create a logs directory if it doesn't exist
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+from backend.core.log_context import RateLimitFilter, RequestContextFilter
+
+from dotenv import load_dotenv
+load_dotenv()
+
+log_dir = os.getenv("LOG_DIR", "logs")
+# "process" gives every process its own file, so several uvicorn workers never
+# write to (or rotate) the same one; "shared" is one file for single-process
+# runs; "none" logs to the console only, for setups where stdout is collected
+LOG_FILE_MODE = os.getenv("LOG_FILE_MODE", "process")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# "text" for the human-readable lines, "json" for one JSON object per line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
 
 log_file = os.path.join(log_dir, "app_errors.log")
 
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+# Define the log format to include object ID, error message, timestamp, level, etc.
+class OptionalObjectIdFormatter(logging.Formatter):
+    def format(self, record):
+        object_id = getattr(record, "object_id", None)
+        if object_id is not None:
+            record.object_id_str = f"(Object ID: {object_id})"
+        else:
+            record.object_id_str = ""
+        return super().format(record)
+
+
+# attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: timestamp, level, logger, message and
+    source, plus object_id, request_id, user_id, latency_ms, suppressed and
+    any other extra= fields when present, and the traceback as `exc_info`.
+    """
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "source": f"{record.filename}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in ("object_id_str", "log_key"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    The queue never leaves the process, so records go on it as they are,
+    only with the message rendered now (its args may change later);
+    formatters on the listener side still see exc_info and extras.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def _log_file_path(directory: str, mode: str) -> str:
+    if mode == "process":
+        return os.path.join(directory, f"app_errors.{os.getpid()}.log")
+    return os.path.join(directory, "app_errors.log")
+
 
 # Configure the logger
-def setup_logging():
+def setup_logging(directory: Optional[str] = None, file_mode: Optional[str] = None):
+    """
+    Configures the idea_app logger. Callers only put records on an
+    in-memory queue; a QueueListener thread does the formatting, file
+    writes and rotation, so logging never blocks the event loop. Calling
+    it again while configured is a no-op.
+    """
+    global _listener, _queue_handler
+
     logger = logging.getLogger("idea_app")
-    logger.setLevel(logging.INFO)  # Only log ERROR level and above
-
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=1024 * 1024 * 5,  # 5 MB
-        backupCount=5,  # Keep up to 5 old log files
-        encoding="utf-8",
-    )
-
-    # Define the log format to include object ID, error message, timestamp, level, etc.
-    class OptionalObjectIdFormatter(logging.Formatter):
-        def format(self, record):
-            object_id = getattr(record, "object_id", None)
-            if object_id is not None:
-                record.object_id_str = f"(Object ID: {object_id})"
-            else:
-                record.object_id_str = ""
-            return super().format(record)
-
-    formatter = OptionalObjectIdFormatter(
-        "%(asctime)s - %(levelname)s - %(name)s - %(filename)s:%(lineno)d %(object_id_str)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-
-    # Add the handler to the logger
-    logger.addHandler(file_handler)
+    if _listener is not None:
+        return logger
+    logger.setLevel(LOG_LEVEL)
+
+    directory = directory or log_dir
+    file_mode = file_mode or LOG_FILE_MODE
+    handlers = []
+
+    if file_mode != "none":
+        os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            _log_file_path(directory, file_mode),
+            maxBytes=1024 * 1024 * 5,  # 5 MB
+            backupCount=5,  # Keep up to 5 old log files
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else OptionalObjectIdFormatter(
+            "%(asctime)s - %(levelname)s - %(name)s - %(filename)s:%(lineno)d %(object_id_str)s - %(message)s"
+        ))
+        handlers.append(file_handler)
 
     # Optionally, also log to console for development
     console_handler = logging.StreamHandler()
-    console_formatter = logging.Formatter(
+    console_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(
         "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
-    )
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    ))
+    handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _InProcessQueueHandler(log_queue)
+    # both run before queueing: the request context is only visible to the
+    # caller, and a sampled-out record shouldn't cost a queue slot
+    _queue_handler.addFilter(RequestContextFilter())
+    _queue_handler.addFilter(RateLimitFilter())
+    logger.addHandler(_queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
 
     return logger
+
+
+def stop_logging():
+    """Writes out whatever is still queued and stops the listener thread."""
+    global _listener, _queue_handler
+
+    if _listener is None:
+        return
+    logging.getLogger("idea_app").removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
@@ -1,18 +1,29 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi_pagination import add_pagination
 from fastapi.middleware.cors import CORSMiddleware
 import redis.asyncio as redis
-from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
-from typing import List
+import json
+from typing import Optional
 import uvicorn
 from logging_config import setup_logging
 from contextlib import asynccontextmanager
 import logging
 
 # RabbitMQ imports
-from backend.core.rabbitmq import connect_rabbitmq, get_rabbitmq_channel # Import the new functions
+from backend.core.rabbitmq import connect_rabbitmq, init_publisher, close_publisher
+from backend.core.outbox import start_relay, stop_relay
 
+from backend.core.cache import REDIS_URL, init_cache
+from backend.auth import hashing
+from backend.core.image_store import (
+    IMAGE_STORE, LOCAL_IMAGE_BASE_URL, LOCAL_IMAGE_ROOT, LocalImageFiles, configure_image_store, close_image_store,
+)
+from backend.core.broadcast import create_bus
+from backend import db
+from backend.auth.jwt import verify_token
+from backend.auth.schema import TokenData
+from backend.core.websocket import TOPIC_PATTERN, manager
+from backend.ideas import services as ideas_services
 from backend.middleware import TimingMiddleware
 from fastapi_pagination import add_pagination
 
@@ -21,6 +32,7 @@ from backend.ideas import router as ideas_router
 from backend.users import router as users_router
 from backend.tags import router as tags_router
 from backend.scripts import router as scripts_router
+from backend.internal import router as internal_router
 
 # 1. Call setup_logging() once at the application's entry point
 setup_logging()
@@ -39,7 +51,18 @@ async def lifespan(app: FastAPI):
     global _rabbitmq_connection # Declare intent to modify the global variable
 
     logger.info("Application starting up...")
+    redis_client = redis.from_url(REDIS_URL)
     try:
+        # Response cache for the listing routes
+        init_cache(redis_client)
+        logger.info("Response cache initialised.")
+
+        # Image storage backend, configured once for the whole process
+        configure_image_store()
+
+        # Relay WebSocket broadcasts between workers
+        await manager.start_bus(create_bus(redis_client))
+
         # Connect to RabbitMQ
         _rabbitmq_connection = await connect_rabbitmq()
         # print connected if successful
@@ -48,6 +71,10 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning("RabbitMQ connection is closed or not established.")
         logger.info("RabbitMQ connection established during startup.")
+        # Publishers share this connection instead of opening their own
+        publisher = init_publisher(_rabbitmq_connection)
+        # Domain events committed to the outbox are relayed from here
+        start_relay(db.AsyncSessionLocal, publisher)
 
         yield # Yield control to the application (FastAPI will start serving requests)
 
@@ -57,12 +84,18 @@ async def lifespan(app: FastAPI):
 
     finally:
         logger.info("Application shutting down...")
+        await stop_relay()
+        await close_publisher()
         # Close RabbitMQ connection
         if _rabbitmq_connection and not _rabbitmq_connection.is_closed:
             await _rabbitmq_connection.close()
             logger.info("RabbitMQ connection closed during shutdown.")
         else:
             logger.warning("RabbitMQ connection was not open or already closed during shutdown.")
+        await manager.stop_bus()
+        await redis_client.aclose()
+        hashing.shutdown_executor()
+        await close_image_store()
 
 
 app = FastAPI(title="Fast API Ticket Master App",
@@ -73,9 +106,6 @@ app = FastAPI(title="Fast API Ticket Master App",
 
 origins = ["http://localhost:8080", "http://localhost:3000",]
 
-# Add pagination
-add_pagination(app)
-
 # Add the timing middleware
 app.add_middleware(TimingMiddleware)
 
@@ -92,64 +122,89 @@ app.include_router(ideas_router.router)
 app.include_router(users_router.router)
 app.include_router(tags_router.router)
 app.include_router(scripts_router.router)
+app.include_router(internal_router.router)
+
+if IMAGE_STORE == "local":
+    # Serve locally stored images; put a CDN in front of this path in production
+    app.mount(LOCAL_IMAGE_BASE_URL, LocalImageFiles(directory=LOCAL_IMAGE_ROOT, check_dir=False), name="images")
+
+# Add pagination once the routers are registered so their paginated routes are
+# wired up even when the lifespan hook has not run (e.g. under TestClient)
+add_pagination(app)
+
+def _token_user(token: Optional[str]) -> Optional[TokenData]:
+    if not token:
+        return None
+    try:
+        return verify_token(token, HTTPException(status_code=401))
+    except HTTPException:
+        return None
+
+
+def _parse_command(data: str):
+    """Returns (action, topic) for subscription commands, None for chat text."""
+    try:
+        command = json.loads(data)
+    except ValueError:
+        return None
+    if isinstance(command, dict) and command.get("action") in ("subscribe", "unsubscribe"):
+        return command["action"], command.get("topic")
+    return None
+
+
+async def _can_subscribe(user: Optional[TokenData], topic: str) -> bool:
+    if user is None:
+        return False
+    kind, object_id = topic.split(":")
+    if kind == "user":
+        return int(object_id) == user.id
+    async with db.AsyncSessionLocal() as database:
+        return await ideas_services.can_view_idea(int(object_id), user.id, database)
+
+
+async def _handle_command(websocket: WebSocket, user: Optional[TokenData], action: str, topic):
+    if not isinstance(topic, str) or not TOPIC_PATTERN.match(topic):
+        reply = {"event": "error", "detail": f"Unknown topic {topic!r}."}
+    elif action == "unsubscribe":
+        manager.unsubscribe(websocket, topic)
+        reply = {"event": "unsubscribed", "topic": topic}
+    elif await _can_subscribe(user, topic):
+        manager.subscribe(websocket, topic)
+        reply = {"event": "subscribed", "topic": topic}
+    else:
+        reply = {"event": "error", "detail": f"Not allowed to subscribe to {topic}."}
+    await manager.send_personal_message(json.dumps(reply), websocket)
 
-# ConnectionManager class to handle active WebSocket connections
-class ConnectionManager:
-    def __init__(self):
-        # List to store active WebSocket connections
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        """
-        Accepts a new WebSocket connection and adds it to the active_connections list.
-        """
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        print(f"New connection established: {websocket.client}")
-
-    def disconnect(self, websocket: WebSocket):
-        """
-        Removes a disconnected WebSocket from the active_connections list.
-        """
-        self.active_connections.remove(websocket)
-        print(f"Connection disconnected: {websocket.client}")
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        """
-        Sends a message to a specific WebSocket client.
-        """
-        await websocket.send_text(message)
-        print(f"Sent personal message to {websocket.client}: {message}")
-
-    async def broadcast(self, message: str):
-        """
-        Sends a message to all active WebSocket clients.
-        """
-        print(f"Broadcasting message: {message}")
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except RuntimeError as e:
-                # Handle cases where connection might have closed unexpectedly
-                print(f"Error sending to {connection.client}: {e}. Removing connection.")
-                self.disconnect(connection)
-
-# Create an instance of the ConnectionManager
-manager = ConnectionManager()
 
 # WebSocket endpoint for chat
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    client_id: str,
+    token: Optional[str] = None,
+    batch_ms: Optional[int] = None,
+):
     """
     Handles WebSocket connections for chat.
-    Each client connects with a unique client_id.
+    Each client connects with a unique client_id. Clients that pass their
+    access token as ?token= can also send
+    {"action": "subscribe" | "unsubscribe", "topic": "idea:<id>" | "user:<id>"}
+    to receive live updates for an idea they can see, or their own
+    notifications. Any other text goes to the chat.
+    ?batch_ms=<20-50> asks for messages to be batched into JSON array
+    frames over that window.
     """
-    await manager.connect(websocket)
+    user = _token_user(token)
+    await manager.connect(websocket, batch_window_ms=batch_ms, user_id=user.id if user is not None else None)
     await manager.broadcast(f"Client #{client_id} joined the chat")
     try:
         while True:
             # Receive text data from the WebSocket
             data = await websocket.receive_text()
+            command = _parse_command(data)
+            if command is not None:
+                await _handle_command(websocket, user, *command)
+                continue
             # Broadcast the received message to all connected clients
             await manager.broadcast(f"Client #{client_id}: {data}")
     except WebSocketDisconnect:
@@ -158,7 +213,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         await manager.broadcast(f"Client #{client_id} left the chat")
     except Exception as e:
         # Catch any other unexpected errors
-        print(f"An unexpected error occurred with client {client_id}: {e}")
+        logger.error(f"An unexpected error occurred with client {client_id}: {e}")
         manager.disconnect(websocket)
         await manager.broadcast(f"Client #{client_id} had an error and left the chat.")
 
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+
+import fakeredis
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+
+# Get the absolute path to the project's root directory
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Add the project root to sys.path if it's not already there
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend import db
+from backend.core.cache import CACHE_PREFIX, init_cache
+from backend.auth.hashing import get_password_hash
+from backend.auth.models import User
+from backend.ideas import models
+
+
+# SQLite refuses an autoincrement column inside a composite primary key, so
+# idea_tags is created by hand with the same columns and cascades.
+IDEA_TAGS_DDL = """
+CREATE TABLE idea_tags (
+    id INTEGER,
+    idea_id INTEGER NOT NULL REFERENCES ideas (id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+    PRIMARY KEY (idea_id, tag_id)
+)
+"""
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """
+    Offline stand-in for the Postgres database: a throwaway SQLite file with
+    the application schema and one user, reached through aiosqlite.
+    NullPool keeps connections from leaking between event loops.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool
+    )
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def _create_schema():
+        tables = [t for t in db.Base.metadata.sorted_tables if t.name != "idea_tags"]
+        async with engine.begin() as connection:
+            await connection.run_sync(db.Base.metadata.create_all, tables=tables)
+            await connection.execute(text(IDEA_TAGS_DDL))
+            for index in models.IdeaTag.__table__.indexes:
+                await connection.run_sync(index.create)
+        async with session_factory() as session:
+            session.add(User(username="tester", email="tester@example.com", role="user", password_hash=get_password_hash("testpassword")))
+            await session.commit()
+
+    asyncio.run(_create_schema())
+    yield engine, session_factory
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def offline_client(sqlite_db, monkeypatch):
+    """
+    TestClient whose database dependency (and the session factory used by
+    background jobs) points at sqlite_db and whose current user is the
+    seeded user, so no Postgres or token is needed.
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+    from backend.auth.current_user import user_cache
+    from backend.auth.jwt import get_current_user
+    from backend.auth.schema import TokenData
+
+    engine, session_factory = sqlite_db
+
+    async def _get_test_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[db.get_async_db] = _get_test_db
+    monkeypatch.setattr(db, "AsyncSessionLocal", session_factory)
+    app.dependency_overrides[get_current_user] = lambda: TokenData(email="tester@example.com", id=1)
+    user_cache.clear()
+    # Response caching stays off unless a test asks for response_cache
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX, enable=False)
+    yield TestClient(app), engine, session_factory
+    app.dependency_overrides.clear()
+    FastAPICache.reset()
+
+
+@pytest.fixture
+def response_cache(offline_client):
+    """
+    Turns the response cache on for offline_client, backed by an in-process
+    fake Redis, and returns the cache backend.
+    """
+    FastAPICache.reset()
+    return init_cache(fakeredis.FakeAsyncRedis())
+
+
+@pytest.fixture
+def seed_ideas():
+    """
+    Returns a helper that creates `count` shared ideas, each with tags, a
+    script and a comment, so every relationship IdeaList serializes has rows.
+    """
+    def _seed_ideas(session_factory, count):
+        async def _seed():
+            async with session_factory() as session:
+                tags = [
+                    models.Tag(name=f"tag-{count}-{i}", description="seeded", user_id=1)
+                    for i in range(3)
+                ]
+                session.add_all(tags)
+                for i in range(count):
+                    idea = models.Idea(
+                        title=f"Idea {i}", description="seeded", user_id=1, is_shared=1
+                    )
+                    idea.tags.extend(tags)
+                    idea.scripts.append(
+                        models.IdeaScript(title="script", script_content="print()", user_id=1)
+                    )
+                    idea.comments.append(models.IdeaComment(content="comment", user_id=1))
+                    session.add(idea)
+                await session.commit()
+
+        asyncio.run(_seed())
+
+    return _seed_ideas
+
+
+@pytest.fixture
+def local_image_store(tmp_path):
+    """
+    Installs a LocalImageStore rooted in the test's temp directory as the
+    process-wide image store.
+    """
+    from backend.core import image_store
+
+    store = image_store.configure_image_store(
+        image_store.LocalImageStore(root=str(tmp_path / "images"), base_url="/media/images")
+    )
+    yield store
+    asyncio.run(image_store.close_image_store())
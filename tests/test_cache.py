@@ -0,0 +1,65 @@
+import pytest
+
+from backend.core.query_counter import QueryCounter
+
+
+def cache_status(response):
+    return response.headers.get("X-FastAPI-Cache")
+
+
+@pytest.mark.parametrize("url", ["/api/ideas/", "/api/ideas/shared", "/api/ideas/1", "/api/tags/", "/api/scripts/"])
+def test_cached_routes_hit_without_touching_the_database(offline_client, response_cache, seed_ideas, url):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 2)
+
+    first = client.get(url)
+    with QueryCounter(engine) as queries:
+        second = client.get(url)
+
+    assert first.status_code == second.status_code == 200, second.text
+    assert (cache_status(first), cache_status(second)) == ("MISS", "HIT")
+    assert second.json() == first.json()
+    assert queries.count == 0, queries.statements
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_cache_keys_are_per_user(offline_client, response_cache, seed_ideas):
+    from main import app
+    from backend.auth.jwt import get_current_user
+    from backend.auth.schema import TokenData
+
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    assert len(client.get("/api/ideas/").json()["items"]) == 1
+
+    app.dependency_overrides[get_current_user] = lambda: TokenData(email="other@example.com", id=2)
+    response = client.get("/api/ideas/")
+
+    assert cache_status(response) == "MISS"
+    assert response.json()["items"] == []
+
+
+@pytest.mark.parametrize(
+    "method, url, body, stale_urls",
+    [
+        ("post", "/api/ideas/", {"title": "New", "description": "d", "tags": ["tag-1-0"]}, ["/api/ideas/", "/api/tags/"]),
+        ("put", "/api/ideas/1", {"title": "Renamed"}, ["/api/ideas/", "/api/ideas/1", "/api/ideas/shared"]),
+        ("delete", "/api/ideas/1", None, ["/api/ideas/", "/api/ideas/shared", "/api/scripts/"]),
+        ("post", "/api/ideas/1/comments", {"content": "hi", "idea_id": 1}, ["/api/ideas/1", "/api/ideas/shared"]),
+        ("put", "/api/tags/1", {"name": "renamed-tag"}, ["/api/tags/", "/api/ideas/", "/api/ideas/shared"]),
+        ("post", "/api/scripts/", {"idea_id": 1, "title": "s", "script_content": "x"}, ["/api/scripts/", "/api/ideas/1"]),
+    ],
+)
+def test_writes_invalidate_affected_listings(offline_client, response_cache, seed_ideas, method, url, body, stale_urls):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    for stale_url in stale_urls:
+        assert cache_status(client.get(stale_url)) == "MISS"
+        assert cache_status(client.get(stale_url)) == "HIT"
+
+    kwargs = {"json": body} if body is not None else {}
+    response = getattr(client, method)(url, **kwargs)
+    assert response.status_code < 300, response.text
+
+    for stale_url in stale_urls:
+        assert cache_status(client.get(stale_url)) == "MISS", stale_url
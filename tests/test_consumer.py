@@ -0,0 +1,291 @@
+import asyncio
+
+import aio_pika
+
+from benchmarks.amqp_standin import StandInBroker
+from backend.core.consumer import (
+    AckBatcher,
+    BatchConsumer,
+    NotificationConsumer,
+    PartialBatchFailure,
+    peek_dead_letters,
+    replay_dead_letters,
+)
+from backend.core.rabbitmq import EXCHANGE_NAME, build_message
+
+
+def publish(broker, count, routing_key="idea.created"):
+    for i in range(count):
+        broker.route(EXCHANGE_NAME, routing_key, build_message({"id": i}))
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_handlers_run_concurrently_and_acks_are_batched():
+    async def scenario():
+        broker = StandInBroker()
+        running, peak, seen = 0, 0, []
+
+        async def handler(routing_key, payload):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.005)
+            running -= 1
+            seen.append(payload["id"])
+
+        consumer = NotificationConsumer(
+            broker.connect(), handler, prefetch=20, concurrency=4, ack_batch=8, ack_interval_ms=10
+        )
+        await consumer.start()
+        publish(broker, 100)
+        await wait_for(lambda: len(seen) == 100)
+        await consumer.stop()
+        return peak, sorted(seen), broker, consumer
+
+    peak, seen, broker, consumer = asyncio.run(scenario())
+    assert peak == 4
+    assert seen == list(range(100))
+    assert broker.queues["notifications_queue"].messages == []
+    assert consumer.stats()["processed"] == 100
+    assert broker.ack_frames < 100 / 4
+
+
+def test_malformed_messages_are_dead_lettered_and_failures_retried():
+    async def scenario():
+        broker = StandInBroker()
+        attempts = {}
+
+        async def handler(routing_key, payload):
+            attempts[payload["id"]] = attempts.get(payload["id"], 0) + 1
+            if payload["id"] == 1 and attempts[1] == 1:
+                raise RuntimeError("transient")
+
+        consumer = NotificationConsumer(
+            broker.connect(), handler, prefetch=4, concurrency=2, retry_delays_ms=[10]
+        )
+        await consumer.start()
+        publish(broker, 3)
+        broker.route(EXCHANGE_NAME, "idea.created", aio_pika.Message(body=b"not json"))
+        await wait_for(lambda: attempts.get(1) == 2 and consumer.rejected == 1)
+        await consumer.stop()
+        return attempts, broker
+
+    attempts, broker = asyncio.run(scenario())
+    assert attempts == {0: 1, 1: 2, 2: 1}
+    assert broker.queues["notifications_queue"].messages == []
+    [(_, dead)] = broker.queues["notifications_queue.dead"].messages
+    assert dead.body == b"not json"
+
+
+def test_stop_drains_delivered_messages():
+    async def scenario():
+        broker = StandInBroker()
+        done = []
+        started = asyncio.Event()
+
+        async def handler(routing_key, payload):
+            started.set()
+            await asyncio.sleep(0.02)
+            done.append(payload["id"])
+
+        consumer = NotificationConsumer(broker.connect(), handler, prefetch=6, concurrency=2)
+        await consumer.start()
+        publish(broker, 20)
+        await started.wait()
+        await consumer.stop()
+        return done, broker
+
+    done, broker = asyncio.run(scenario())
+    # everything already delivered finished; the rest never left the queue
+    assert len(done) == 6
+    assert len(broker.queues["notifications_queue"].messages) == 14
+
+
+def test_ack_batcher_only_acks_the_settled_head():
+    class Message:
+        def __init__(self, tag):
+            self.delivery_tag = tag
+            self.acked = self.nacked = None
+
+        async def ack(self, multiple=False):
+            self.acked = multiple
+
+        async def nack(self, requeue=True):
+            self.nacked = requeue
+
+    async def scenario():
+        batcher = AckBatcher(batch_size=2, interval=10)
+        messages = [Message(tag) for tag in range(1, 5)]
+        for message in messages:
+            batcher.track(message)
+        await batcher.ack(messages[2])
+        await batcher.nack(messages[1], requeue=False)
+        await batcher.ack(messages[3])  # batch full, but tag 1 is still in flight
+        assert [m.acked for m in messages] == [None, None, None, None]
+        await batcher.ack(messages[0])
+        await batcher.close()
+        return messages
+
+    messages = asyncio.run(scenario())
+    # one multiple-ack on the last acked tag covers 1, 3 and 4; 2 was nacked alone
+    assert [m.acked for m in messages] == [None, None, None, True]
+    assert messages[1].nacked is False
+
+
+def test_poison_message_backs_off_then_parks_without_blocking_the_rest():
+    async def scenario():
+        broker = StandInBroker()
+        attempts, handled = [], []
+        healthy = 50
+
+        async def handler(routing_key, payload):
+            if payload["id"] == 0:
+                attempts.append(asyncio.get_running_loop().time())
+                raise ValueError("poison")
+            handled.append(routing_key)
+
+        consumer = NotificationConsumer(
+            broker.connect(), handler, prefetch=4, concurrency=1, max_attempts=3, retry_delays_ms=[20, 40]
+        )
+        await consumer.start()
+        publish(broker, healthy + 1, routing_key="comment.created")
+        await wait_for(lambda: len(handled) == healthy)
+        # every healthy message got through before the poison message's first retry
+        assert len(attempts) == 1
+        await wait_for(lambda: consumer.dead_lettered == 1)
+        await consumer.stop()
+        peeked = await peek_dead_letters(broker.connect())
+        await asyncio.sleep(0)
+        return attempts, handled, peeked, broker, consumer
+
+    attempts, handled, peeked, broker, consumer = asyncio.run(scenario())
+    assert len(attempts) == 3
+    # backoff grows: ~20 ms before the second attempt, ~40 ms before the third
+    assert attempts[1] - attempts[0] >= 0.02
+    assert attempts[2] - attempts[1] >= 0.04
+    assert set(handled) == {"comment.created"}
+    assert consumer.stats()["retried"] == 2
+    [dead] = peeked
+    assert dead["routing_key"] == "comment.created"
+    assert dead["attempts"] == 3
+    assert dead["error"] == "ValueError: poison"
+    # peeking leaves the message where it was
+    assert len(broker.queues["notifications_queue.dead"].messages) == 1
+
+
+def test_dead_letters_are_replayed_in_bulk():
+    async def scenario():
+        broker = StandInBroker()
+        broken = True
+        handled = []
+
+        async def handler(routing_key, payload):
+            if broken:
+                raise RuntimeError("sink down")
+            handled.append((routing_key, payload["id"]))
+
+        consumer = NotificationConsumer(broker.connect(), handler, max_attempts=1)
+        await consumer.start()
+        publish(broker, 5, routing_key="tag.created")
+        await wait_for(lambda: consumer.dead_lettered == 5)
+
+        broken = False
+        moved = await replay_dead_letters(broker.connect(), batch_size=2)
+        await wait_for(lambda: len(handled) == 5)
+        await consumer.stop()
+        return moved, sorted(handled), broker
+
+    moved, handled, broker = asyncio.run(scenario())
+    assert moved == 5
+    assert handled == [("tag.created", i) for i in range(5)]
+    assert broker.queues["notifications_queue.dead"].messages == []
+
+
+def test_batch_handler_gets_micro_batches_by_size_and_window():
+    async def scenario():
+        broker = StandInBroker()
+        batches = []
+
+        async def handler(deliveries):
+            batches.append([d.payload["id"] for d in deliveries])
+
+        consumer = BatchConsumer(
+            broker.connect(), handler, batch_size=10, batch_window_ms=20, prefetch=40, concurrency=1
+        )
+        await consumer.start()
+        publish(broker, 25)
+        await wait_for(lambda: sum(map(len, batches)) == 25)
+        await consumer.stop()
+        return batches, broker
+
+    batches, broker = asyncio.run(scenario())
+    # two full batches, then the window closes on the remainder
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert sorted(sum(batches, [])) == list(range(25))
+    # one multiple-ack per batch
+    assert broker.ack_frames == 3
+
+
+def test_partial_batch_failure_retries_only_the_failed_deliveries():
+    async def scenario():
+        broker = StandInBroker()
+        seen = []
+
+        async def handler(deliveries):
+            seen.extend((d.payload["id"], d.attempts) for d in deliveries)
+            failures = {
+                index: RuntimeError("constraint violation")
+                for index, d in enumerate(deliveries)
+                if d.payload["id"] % 3 == 0 and d.attempts == 0
+            }
+            if failures:
+                raise PartialBatchFailure(failures)
+
+        consumer = BatchConsumer(
+            broker.connect(), handler, batch_size=10, batch_window_ms=5, prefetch=20, concurrency=1,
+            retry_delays_ms=[10],
+        )
+        await consumer.start()
+        publish(broker, 10)
+        await wait_for(lambda: consumer.processed == 10)
+        await consumer.stop()
+        return seen, consumer
+
+    seen, consumer = asyncio.run(scenario())
+    first_pass = [id_ for id_, attempts in seen if attempts == 0]
+    retried = sorted(id_ for id_, attempts in seen if attempts == 1)
+    assert sorted(first_pass) == list(range(10))
+    assert retried == [0, 3, 6, 9]
+    assert consumer.stats()["failed"] == 4
+    assert consumer.stats()["retried"] == 4
+
+
+def test_batch_handler_error_retries_the_whole_batch():
+    async def scenario():
+        broker = StandInBroker()
+        calls = []
+
+        async def handler(deliveries):
+            calls.append(len(deliveries))
+            if len(calls) == 1:
+                raise ConnectionError("database unavailable")
+
+        consumer = BatchConsumer(
+            broker.connect(), handler, batch_size=5, batch_window_ms=5, prefetch=10, concurrency=1,
+            retry_delays_ms=[10],
+        )
+        await consumer.start()
+        publish(broker, 5)
+        await wait_for(lambda: consumer.processed == 5)
+        await consumer.stop()
+        return calls, consumer
+
+    calls, consumer = asyncio.run(scenario())
+    assert sum(calls[1:]) == 5
+    assert consumer.stats()["retried"] == 5
@@ -0,0 +1,42 @@
+from backend.auth.current_user import user_cache
+from backend.core.query_counter import QueryCounter
+
+
+def user_queries(queries):
+    return [s for s in queries.statements if 'FROM "user"' in s or "FROM user" in s]
+
+
+def test_profile_loads_the_user_by_id(offline_client):
+    client, engine, session_factory = offline_client
+
+    with QueryCounter(engine) as queries:
+        response = client.get("/api/auth/profile")
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"id": 1, "username": "tester", "email": "tester@example.com"}
+    [statement] = user_queries(queries)
+    assert "email" not in statement.split("WHERE", 1)[1]
+
+
+def test_write_paths_reuse_the_cached_user(offline_client):
+    client, engine, session_factory = offline_client
+    client.get("/api/auth/profile")
+
+    with QueryCounter(engine) as queries:
+        idea = client.post("/api/ideas/", json={"title": "Cached", "description": "d"})
+        tag = client.post("/api/tags/", json={"name": "cached", "description": "d"})
+
+    assert idea.status_code == tag.status_code == 201, (idea.text, tag.text)
+    assert user_queries(queries) == []
+    assert user_cache.stats()["hits"] == 2
+
+
+def test_without_the_shared_cache_the_user_is_loaded_once_per_request(offline_client, monkeypatch):
+    client, engine, session_factory = offline_client
+    monkeypatch.setattr(user_cache, "maxsize", 0)
+
+    with QueryCounter(engine) as queries:
+        response = client.post("/api/ideas/", json={"title": "Uncached", "description": "d"})
+
+    assert response.status_code == 201, response.text
+    assert len(user_queries(queries)) == 1
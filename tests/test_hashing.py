@@ -0,0 +1,70 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from backend.auth import hashing
+from backend.auth.models import User
+
+
+def test_register_stores_hash_and_login_verifies_it(offline_client):
+    client, engine, session_factory = offline_client
+
+    response = client.post(
+        "/api/auth/register",
+        json={"username": "newuser", "email": "newuser@example.com", "password": "secret123"},
+    )
+    assert response.status_code == 201, response.text
+
+    login = client.post("/api/auth/login", json={"email": "newuser@example.com", "password": "secret123"})
+    assert login.status_code == 200, login.text
+    assert "access_token" in login.json()
+
+    wrong = client.post("/api/auth/login", json={"email": "newuser@example.com", "password": "nope1234"})
+    assert wrong.status_code == 400
+
+
+def test_user_refuses_a_plaintext_password():
+    hashed = hashing.get_password_hash("secret123")
+    assert User("u", "u@example.com", "user", password_hash=hashed).password == hashed
+    for value in ("secret123", "", None):
+        try:
+            User("u", "u@example.com", "user", password_hash=value)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {value!r} as a password hash")
+
+
+def test_hashing_does_not_block_the_event_loop():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        hashed = await hashing.hash_password("secret123")
+        assert await hashing.check_password("secret123", hashed)
+        task.cancel()
+        return ticks
+
+    # bcrypt takes far longer than one tick; the loop keeps ticking meanwhile
+    assert asyncio.run(scenario()) > 1
+
+
+def test_rejects_calls_beyond_the_pending_limit(monkeypatch):
+    monkeypatch.setattr(hashing, "HASHING_MAX_PENDING", 2)
+
+    async def scenario():
+        return await asyncio.gather(
+            *(hashing.hash_password("secret123") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    assert rejected[0].headers["Retry-After"]
+    assert hashing.pending_calls() == 0
@@ -0,0 +1,362 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from backend.core import image_store, uploads
+from backend.ideas import models
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def test_upload_is_stored_content_addressed(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 1024)
+    payload = PNG_SIGNATURE + bytes(range(256)) * 40
+    digest = hashlib.sha256(payload).hexdigest()
+
+    response = client.post("/api/ideas/1/images", files={"file": ("Shot.PNG", payload, "image/png")})
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["filename"] == f"{digest[:2]}/{digest[2:4]}/{digest}.png"
+    assert body["url"] == f"/media/images/{body['filename']}"
+    assert (body["sha256"], body["size"]) == (digest, len(payload))
+    with open(local_image_store.path_for(body["filename"]), "rb") as stored:
+        assert stored.read() == payload
+    # only the final file is left behind, no temporary chunks
+    assert [f for _, _, files in os.walk(local_image_store.root) for f in files] == [f"{digest}.png"]
+
+
+def test_upload_over_the_size_limit_is_rejected(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    monkeypatch.setattr(uploads, "IMAGE_UPLOAD_MAX_BYTES", 100)
+
+    response = client.post("/api/ideas/1/images", files={"file": ("big.png", b"x" * 101, "image/png")})
+
+    assert response.status_code == 413
+    assert os.listdir(local_image_store.root) == []
+
+
+def test_empty_upload_is_rejected(offline_client, seed_ideas, local_image_store):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+
+    response = client.post("/api/ideas/1/images", files={"file": ("empty.png", b"", "image/png")})
+
+    assert response.status_code == 400
+
+
+def test_only_sniffed_image_types_are_accepted(offline_client, seed_ideas, local_image_store):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+
+    for name, payload, content_type in (
+        ("x.html", b"<html><script>alert(1)</script></html>", "text/html"),
+        ("x.svg", b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>', "image/svg+xml"),
+        ("x.png", b"<script>alert(1)</script>", "image/png"),
+    ):
+        response = client.post("/api/ideas/1/images", files={"file": (name, payload, content_type)})
+        assert response.status_code == 400, name
+    assert os.listdir(local_image_store.root) == []
+
+    # a real image named .html is stored and served as what it is
+    response = client.post("/api/ideas/1/images", files={"file": ("x.html", PNG_SIGNATURE + b"img", "text/html")})
+    assert response.status_code == 201, response.text
+    assert response.json()["filename"].endswith(".png")
+
+
+def test_local_images_are_served_with_nosniff(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    (tmp_path / "a.png").write_bytes(PNG_SIGNATURE)
+    app = FastAPI()
+    app.mount("/media/images", image_store.LocalImageFiles(directory=str(tmp_path)))
+
+    response = TestClient(app).get("/media/images/a.png")
+
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+def test_cloudinary_store_uploads_off_the_event_loop(offline_client, seed_ideas, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    calls = []
+
+    def upload(fileobj, public_id):
+        calls.append({"bytes": fileobj.read(), "public_id": public_id, "thread": threading.get_ident()})
+        return {"secure_url": f"https://cdn.example.com/{public_id}"}
+
+    monkeypatch.setattr(image_store.uploader, "upload", upload)
+    image_store.configure_image_store(image_store.CloudinaryImageStore(folder="idea_images"))
+    payload = PNG_SIGNATURE + b"0" * 2048
+
+    try:
+        response = client.post("/api/ideas/1/images", files={"file": ("shot.png", payload, "image/png")})
+    finally:
+        image_store._image_store = None
+
+    assert response.status_code == 201, response.text
+    [call] = calls
+    assert call["bytes"] == payload
+    assert call["public_id"] == f"idea_images/{hashlib.sha256(payload).hexdigest()}"
+    assert call["thread"] != threading.get_ident()
+    assert response.json()["url"] == f"https://cdn.example.com/{call['public_id']}"
+
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def test_local_store_touches_the_disk_off_the_event_loop(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    calls = []
+    original_replace, original_remove = os.replace, os.remove
+
+    def replace(src, dst):
+        calls.append(("replace", on_event_loop()))
+        return original_replace(src, dst)
+
+    def remove(path):
+        calls.append(("remove", on_event_loop()))
+        return original_remove(path)
+
+    monkeypatch.setattr(image_store.os, "replace", replace)
+    monkeypatch.setattr(image_store.os, "remove", remove)
+
+    assert client.post("/api/ideas/1/images", files={"file": ("a.png", PNG_SIGNATURE + b"local" * 100, "image/png")}).status_code == 201
+    assert client.delete("/api/ideas/1").status_code == 204
+
+    assert calls == [("replace", False), ("remove", False)]
+
+
+def blob_rows(session_factory):
+    async def _rows():
+        async with session_factory() as session:
+            blobs = (await session.execute(select(models.ImageBlob.sha256, models.ImageBlob.ref_count))).all()
+            images = (await session.execute(select(models.IdeaImage.idea_id, models.IdeaImage.blob_id))).all()
+            return [tuple(b) for b in blobs], sorted(tuple(i) for i in images)
+
+    return asyncio.run(_rows())
+
+
+def test_identical_uploads_share_one_stored_blob(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 2)
+    saves = []
+    original_save = local_image_store.save
+
+    async def counting_save(file, upload):
+        saves.append(upload.sha256)
+        return await original_save(file, upload)
+
+    monkeypatch.setattr(local_image_store, "save", counting_save)
+    payload = PNG_SIGNATURE + b"same screenshot" * 100
+    digest = hashlib.sha256(payload).hexdigest()
+
+    first = client.post("/api/ideas/1/images", files={"file": ("a.png", payload, "image/png")})
+    second = client.post("/api/ideas/2/images", files={"file": ("b.png", payload, "image/png")})
+    third = client.post("/api/ideas/2/images", files={"file": ("c.png", payload, "image/png")})
+
+    assert first.status_code == second.status_code == third.status_code == 201
+    assert first.json()["url"] == second.json()["url"] == third.json()["url"]
+    assert saves == [digest]
+    blobs, images = blob_rows(session_factory)
+    assert blobs == [(digest, 3)]
+    assert images == [(1, 1), (2, 1), (2, 1)]
+
+
+def test_blob_is_removed_with_its_last_reference(offline_client, seed_ideas, local_image_store):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 2)
+    payload = PNG_SIGNATURE + b"shared bytes" * 100
+    for idea_id in (1, 2):
+        client.post(f"/api/ideas/{idea_id}/images", files={"file": ("a.png", payload, "image/png")})
+    path = local_image_store.path_for(client.post(
+        "/api/ideas/1/images", files={"file": ("a.png", payload, "image/png")}
+    ).json()["filename"])
+
+    assert client.delete("/api/ideas/1").status_code == 204
+    blobs, images = blob_rows(session_factory)
+    assert [count for _, count in blobs] == [1]
+    assert images == [(2, 1)]
+    assert os.path.exists(path)
+
+    assert client.delete("/api/ideas/2").status_code == 204
+    assert blob_rows(session_factory) == ([], [])
+    assert not os.path.exists(path)
+
+
+def test_reupload_during_release_keeps_the_bytes(offline_client, seed_ideas, local_image_store, monkeypatch):
+    from fastapi import BackgroundTasks, UploadFile
+    from starlette.datastructures import Headers
+
+    from backend.auth.schema import TokenData
+    from backend.ideas import services
+
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 2)
+    payload = PNG_SIGNATURE + b"released and re-uploaded" * 100
+    path = local_image_store.path_for(
+        client.post("/api/ideas/1/images", files={"file": ("a.png", payload, "image/png")}).json()["filename"]
+    )
+    user = TokenData(email="tester@example.com", id=1)
+
+    async def scenario():
+        deleting, resume = asyncio.Event(), asyncio.Event()
+        original_delete = local_image_store.delete
+
+        async def paused_delete(key):
+            deleting.set()
+            await resume.wait()
+            await original_delete(key)
+
+        monkeypatch.setattr(local_image_store, "delete", paused_delete)
+        async with session_factory() as release_db, session_factory() as upload_db:
+            release = asyncio.create_task(services.delete_idea_by_id(1, user, release_db))
+            await deleting.wait()
+            # the last reference is gone and the bytes are about to be removed
+            upload = UploadFile(io.BytesIO(payload), filename="b.png", headers=Headers({"content-type": "image/png"}))
+            reupload = asyncio.create_task(
+                services.upload_idea_image(2, upload, user, upload_db, BackgroundTasks())
+            )
+            await asyncio.sleep(0.2)
+            resume.set()
+            await release
+            return await reupload
+
+    assert asyncio.run(scenario())["sha256"] == hashlib.sha256(payload).hexdigest()
+    blobs, images = blob_rows(session_factory)
+    assert [count for _, count in blobs] == [1]
+    assert [idea_id for idea_id, _ in images] == [2]
+    with open(path, "rb") as stored:
+        assert stored.read() == payload
+
+
+def failing_commit(monkeypatch, fail_on):
+    """Makes the fail_on-th AsyncSession.commit from now on raise."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    original_commit = AsyncSession.commit
+    calls = 0
+
+    async def commit(self):
+        nonlocal calls
+        calls += 1
+        if calls == fail_on:
+            raise ConnectionError("connection dropped")
+        return await original_commit(self)
+
+    monkeypatch.setattr(AsyncSession, "commit", commit)
+
+
+def test_failed_delete_commit_keeps_blob_and_bytes(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    payload = PNG_SIGNATURE + b"kept on rollback" * 100
+    path = local_image_store.path_for(
+        client.post("/api/ideas/1/images", files={"file": ("a.png", payload, "image/png")}).json()["filename"]
+    )
+    failing_commit(monkeypatch, fail_on=1)
+
+    assert client.delete("/api/ideas/1").status_code == 500
+
+    blobs, images = blob_rows(session_factory)
+    assert [count for _, count in blobs] == [1]
+    assert images == [(1, 1)]
+    assert os.path.exists(path)
+
+
+def test_reupload_restores_bytes_lost_to_a_failed_sweep(offline_client, seed_ideas, local_image_store, monkeypatch):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 2)
+    payload = PNG_SIGNATURE + b"swept but not committed" * 100
+    path = local_image_store.path_for(
+        client.post("/api/ideas/1/images", files={"file": ("a.png", payload, "image/png")}).json()["filename"]
+    )
+    # the idea's delete commits, the sweep's commit after the unlink fails
+    failing_commit(monkeypatch, fail_on=2)
+
+    assert client.delete("/api/ideas/1").status_code == 204
+    assert not os.path.exists(path)
+    blobs, images = blob_rows(session_factory)
+    assert [count for _, count in blobs] == [0]
+
+    assert client.post("/api/ideas/2/images", files={"file": ("b.png", payload, "image/png")}).status_code == 201
+    assert [count for _, count in blob_rows(session_factory)[0]] == [1]
+    with open(path, "rb") as stored:
+        assert stored.read() == payload
+
+
+def png_bytes(width, height):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_variants_are_generated_after_upload_and_served_by_variant(offline_client, seed_ideas, local_image_store):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    payload = png_bytes(2400, 1200)
+
+    upload = client.post("/api/ideas/1/images", files={"file": ("big.png", payload, "image/png")})
+    assert upload.status_code == 201, upload.text
+    image_url = f"/api/ideas/1/images/{upload.json()['id']}"
+
+    async def _variants():
+        async with session_factory() as session:
+            rows = await session.execute(select(models.ImageVariant).order_by(models.ImageVariant.variant))
+            return rows.scalars().all()
+
+    thumb, web = asyncio.run(_variants())
+    assert (thumb.variant, thumb.width, thumb.height) == ("thumb", 320, 160)
+    assert (web.variant, web.width, web.height) == ("web", 1600, 800)
+    assert thumb.size < len(payload)
+    assert os.path.exists(local_image_store.path_for(thumb.storage_key))
+
+    responses = {
+        variant: client.get(image_url, params={"variant": variant} if variant else None, follow_redirects=False)
+        for variant in (None, "thumb", "web")
+    }
+    assert {v: r.status_code for v, r in responses.items()} == {None: 307, "thumb": 307, "web": 307}
+    assert responses[None].headers["location"] == upload.json()["url"]
+    assert responses["thumb"].headers["location"] == thumb.url
+    assert responses["web"].headers["location"] == web.url
+    assert client.get(image_url, params={"variant": "huge"}, follow_redirects=False).status_code == 400
+
+    # variants go away with the last reference to their blob
+    assert client.delete("/api/ideas/1").status_code == 204
+    assert asyncio.run(_variants()) == []
+    assert not os.path.exists(local_image_store.path_for(thumb.storage_key))
+
+
+def test_image_store_subclasses_must_implement_their_variant_path():
+    class Incomplete(image_store.ImageStore):
+        derives_variants = True
+
+        def variant_url(self, key, width, height):
+            return key
+
+    with pytest.raises(TypeError):
+        Incomplete()  # save, delete and url_for are abstract
+    with pytest.raises(TypeError, match="read, put"):
+        class NoRenderedVariants(image_store.ImageStore):
+            pass
+    with pytest.raises(TypeError, match="variant_url"):
+        class NoVariantUrls(image_store.ImageStore):
+            derives_variants = True
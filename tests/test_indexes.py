@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, func
+
+from backend.ideas import models
+from backend.ideas import services
+
+
+def explain(engine, statement):
+    """
+    Returns SQLite's EXPLAIN QUERY PLAN output for a SQLAlchemy statement as
+    one string. SQLite stands in for Postgres here; it proves the indexes in
+    the models (and the migration) match the predicates the services issue.
+    """
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+    async def _explain():
+        async with engine.connect() as connection:
+            result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+            return " | ".join(row[-1] for row in result)
+
+    return asyncio.run(_explain())
+
+
+def _listing_query(current_user):
+    return asyncio.run(services.get_idea_listing(None, current_user))
+
+
+def _shared_listing_query():
+    return asyncio.run(services.get_shared_idea_listing(None, current_user=1))
+
+
+@pytest.mark.parametrize(
+    "statement, index",
+    [
+        (
+            lambda: _listing_query(1).order_by(*services.IDEA_KEYSET_ORDER),
+            "ix_ideas_user_id_created_at_id",
+        ),
+        (
+            lambda: _shared_listing_query().order_by(*services.IDEA_KEYSET_ORDER),
+            "ix_ideas_shared_created_at_id",
+        ),
+        (
+            lambda: select(models.Idea).filter(
+                models.Idea.title == "Idea", models.Idea.user_id == 1
+            ),
+            "ix_ideas_user_id_title",
+        ),
+        (
+            lambda: select(models.Tag).filter(models.Tag.user_id == 1),
+            "ix_tags_user_id_name",
+        ),
+        (
+            lambda: select(func.count(models.IdeaScript.id)).filter(
+                models.IdeaScript.idea_id == 1, models.IdeaScript.user_id == 1
+            ),
+            "ix_idea_scripts_idea_id_user_id",
+        ),
+        (
+            lambda: select(models.IdeaComment).filter(models.IdeaComment.idea_id.in_([1, 2, 3])),
+            "ix_idea_comments_idea_id",
+        ),
+        (
+            lambda: select(models.IdeaTag.tag_id).filter(models.IdeaTag.idea_id.in_([1, 2, 3])),
+            "ix_idea_tags_idea_id_tag_id",
+        ),
+    ],
+)
+def test_hot_queries_use_indexes(sqlite_db, statement, index):
+    engine, session_factory = sqlite_db
+
+    plan = explain(engine, statement())
+
+    assert index in plan, plan
@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+
+import pytest
+
+import logging_config
+from backend.core.log_context import _parse_level, RateLimitFilter, RequestContextFilter, begin_request, end_request, set_user_id
+
+
+@pytest.fixture
+def fresh_logging(tmp_path):
+    """Reconfigures logging into tmp_path for one test, then restores the default setup."""
+    logging_config.stop_logging()
+    yield tmp_path
+    logging_config.stop_logging()
+    logging_config.setup_logging()
+
+
+def test_records_are_written_by_the_listener_thread(fresh_logging):
+    logger = logging_config.setup_logging(directory=str(fresh_logging), file_mode="shared")
+    # the caller only enqueues
+    assert [type(h).__name__ for h in logger.handlers] == ["_InProcessQueueHandler"]
+
+    emitting_threads = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            emitting_threads.append(threading.get_ident())
+
+    logging_config._listener.handlers += (Recorder(),)
+    logger.warning("Idea %s not found", 7, extra={"object_id": 7})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.error("Failed", exc_info=True)
+    logging_config.stop_logging()
+
+    assert emitting_threads and threading.get_ident() not in emitting_threads
+    with open(fresh_logging / "app_errors.log", encoding="utf-8") as f:
+        content = f.read()
+    assert "(Object ID: 7) - Idea 7 not found" in content
+    assert "ValueError: boom" in content
+
+
+def test_per_process_files_survive_shutdown(fresh_logging):
+    logging_config.setup_logging(directory=str(fresh_logging), file_mode="process")
+    logger = logging.getLogger("idea_app")
+    logger.warning("before rollover")
+    logging_config._listener.handlers[0].doRollover()
+    logger.warning("after rollover")
+
+    logging_config.stop_logging()
+
+    current = fresh_logging / f"app_errors.{os.getpid()}.log"
+    assert sorted(p.name for p in fresh_logging.iterdir()) == [current.name, f"{current.name}.1"]
+    assert "after rollover" in current.read_text(encoding="utf-8")
+
+
+def test_console_only_mode_writes_no_file(fresh_logging):
+    logging_config.setup_logging(directory=str(fresh_logging / "logs"), file_mode="none")
+    logging.getLogger("idea_app").info("hello")
+    logging_config.stop_logging()
+    assert not (fresh_logging / "logs").exists()
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("idea_app", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_samples_past_the_limit_and_counts_what_it_dropped():
+    limiter = RateLimitFilter(limit=3, window=60, sample_every=5)
+    passed = [r for r in (make_record("Idea %s not found", i) for i in range(13)) if limiter.filter(r)]
+
+    # 3 within the limit, then the 5th and 10th past it
+    assert [r.args[0] for r in passed] == [0, 1, 2, 7, 12]
+    assert [getattr(r, "suppressed", None) for r in passed] == [None, None, None, 4, 4]
+    # other keys and errors have their own budget
+    assert limiter.filter(make_record("Idea %s not found", 0, log_key="other"))
+    assert all(limiter.filter(make_record("Idea %s not found", i, level=logging.ERROR)) for i in range(10))
+
+
+def test_rate_limit_level_accepts_names_and_numbers():
+    assert _parse_level("warning") == _parse_level("WARNING") == _parse_level("30") == logging.WARNING
+    assert _parse_level("25") == 25
+    with pytest.raises(ValueError):
+        _parse_level("Level 30")
+    # a numeric level compares like a named one
+    limiter = RateLimitFilter(limit=1, window=60, max_level=_parse_level("30"))
+    assert all(limiter.filter(make_record("boom", level=logging.ERROR)) for _ in range(3))
+
+
+def test_json_format_carries_request_context():
+    token = begin_request("req-1")
+    set_user_id(42)
+    record = make_record("Idea %s not found", 7, level=logging.WARNING, object_id=7)
+    RequestContextFilter().filter(record)
+    end_request(token)
+
+    entry = json.loads(logging_config.JsonFormatter().format(record))
+
+    assert entry["message"] == "Idea 7 not found"
+    assert entry["level"] == "WARNING"
+    assert (entry["object_id"], entry["request_id"], entry["user_id"]) == (7, "req-1", 42)
+    assert entry["latency_ms"] >= 0
+
+
+def test_responses_carry_the_request_id(offline_client):
+    client, engine, session_factory = offline_client
+
+    assert client.get("/api/ideas/", headers={"X-Request-ID": "abc"}).headers["X-Request-ID"] == "abc"
+    assert len(client.get("/api/ideas/").headers["X-Request-ID"]) == 32
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from benchmarks.amqp_standin import StandInBroker
+from backend.core.outbox import OutboxRelay
+from backend.core.rabbitmq import EXCHANGE_NAME, NotificationPublisher
+from backend.ideas import models
+
+
+def outbox_rows(session_factory):
+    async def _rows():
+        async with session_factory() as session:
+            result = await session.execute(select(models.OutboxEvent).order_by(models.OutboxEvent.id))
+            return result.scalars().all()
+
+    return asyncio.run(_rows())
+
+
+def test_mutations_record_events_in_their_transaction(offline_client, seed_ideas):
+    client, _, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+
+    client.post("/api/ideas/", json={"title": "Outbox", "description": "d", "tags": ["t"]})
+    idea_id = outbox_rows(session_factory)[0].payload["id"]
+    # a rejected duplicate rolls back and leaves no event behind
+    assert client.post("/api/ideas/", json={"title": "Outbox", "description": "d"}).status_code == 400
+    client.put(f"/api/ideas/{idea_id}", json={"status": "active"})
+    client.post("/api/ideas/1/comments", json={"idea_id": 1, "content": "hi"})
+    client.post("/api/tags/", json={"name": "outbox-tag", "description": "d"})
+    tag_id = outbox_rows(session_factory)[-1].payload["id"]
+    client.delete(f"/api/tags/{tag_id}")
+    client.post("/api/scripts/", json={"idea_id": 1, "title": "s", "script_content": "x"})
+    client.delete(f"/api/ideas/{idea_id}")
+
+    events = outbox_rows(session_factory)
+    assert [e.routing_key for e in events] == [
+        "idea.created",
+        "idea.updated",
+        "comment.created",
+        "tag.created",
+        "tag.deleted",
+        "script.created",
+        "idea.deleted",
+    ]
+    assert events[0].payload["tags"] == ["t"]
+    assert events[1].payload == {"id": idea_id, "user_id": 1, "status": "active"}
+    assert events[2].payload["idea_owner_id"] == 1
+
+
+def test_relay_publishes_in_batches_and_clears_the_outbox(offline_client, seed_ideas):
+    client, _, session_factory = offline_client
+    for i in range(5):
+        client.post("/api/ideas/", json={"title": f"Relay {i}", "description": "d"})
+
+    async def scenario():
+        broker = StandInBroker()
+        publisher = NotificationPublisher(broker.connect())
+        await publisher.publish("warmup", {})
+        channel = await broker.connect().channel()
+        queue = await channel.declare_queue("events", durable=True)
+        await queue.bind(EXCHANGE_NAME, routing_key="idea.*")
+
+        relay = OutboxRelay(session_factory, publisher, batch_size=2)
+        assert await relay.drain() == 5
+        assert relay.batches == 3
+        return [json.loads(message.body) for _, message in queue.messages]
+
+    bodies = asyncio.run(scenario())
+    assert [body["event"] for body in bodies] == ["idea.created"] * 5
+    assert [body["data"]["title"] for body in bodies] == [f"Relay {i}" for i in range(5)]
+    assert len({body["event_id"] for body in bodies}) == 5
+    assert outbox_rows(session_factory) == []
+
+
+def test_events_stay_in_the_outbox_when_the_broker_fails(offline_client):
+    client, _, session_factory = offline_client
+    client.post("/api/ideas/", json={"title": "Unsent", "description": "d"})
+
+    class FailingPublisher:
+        async def publish_batch(self, messages):
+            raise ConnectionError("broker unavailable")
+
+    relay = OutboxRelay(session_factory, FailingPublisher())
+    try:
+        asyncio.run(relay.drain())
+    except ConnectionError:
+        pass
+
+    assert [e.routing_key for e in outbox_rows(session_factory)] == ["idea.created"]
+
+
+def test_commit_wakes_the_running_relay(sqlite_db, monkeypatch):
+    from backend.core import outbox
+
+    _, session_factory = sqlite_db
+
+    async def scenario():
+        broker = StandInBroker()
+        publisher = NotificationPublisher(broker.connect())
+        await publisher.publish("warmup", {})
+        channel = await broker.connect().channel()
+        queue = await channel.declare_queue("events", durable=True)
+        await queue.bind(EXCHANGE_NAME, routing_key="#")
+
+        # the poll is far off, so only the commit's wakeup can start the second pass
+        relay = OutboxRelay(session_factory, publisher, poll_interval=60, retry_interval=0.01)
+        passes = asyncio.Queue()
+        drain = relay.drain
+
+        async def recording_drain():
+            moved = await drain()
+            passes.put_nowait(moved)
+            return moved
+
+        monkeypatch.setattr(relay, "drain", recording_drain)
+        monkeypatch.setattr(outbox, "_relay", relay)
+        relay.start()
+        assert await asyncio.wait_for(passes.get(), 5) == 0
+        async with session_factory() as session:
+            outbox.record_event(session, "tag.created", {"id": 1})
+            await session.commit()
+        assert await asyncio.wait_for(passes.get(), 5) == 1
+        await relay.stop()
+        return queue.messages
+
+    messages = asyncio.run(scenario())
+    assert [routing_key for routing_key, _ in messages] == ["tag.created"]
@@ -0,0 +1,70 @@
+import pytest
+
+from backend.core.query_counter import QueryCounter
+
+
+def walk_pages(client, url, size):
+    """
+    Follows next_page cursors until the listing is exhausted and returns
+    every page's JSON body.
+    """
+    pages = []
+    params = {"size": size}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        next_page = pages[-1]["next_page"]
+        if not next_page:
+            return pages
+        params = {"size": size, "cursor": next_page}
+
+
+@pytest.mark.parametrize("url", ["/api/ideas/cursor", "/api/ideas/shared/cursor"])
+def test_cursor_listing_walks_every_idea_once(offline_client, seed_ideas, url):
+    """
+    Walking the cursor listing returns each idea exactly once, newest first.
+    Later pages seek past the previous page's last key instead of skipping
+    rows, and no COUNT(*) is issued.
+    """
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 12)
+
+    with QueryCounter(engine) as queries:
+        pages = walk_pages(client, url, size=5)
+
+    items = [item for page in pages for item in page["items"]]
+    assert [len(page["items"]) for page in pages] == [5, 5, 2]
+    assert len({item["id"] for item in items}) == 12
+    assert [item["id"] for item in items] == sorted((item["id"] for item in items), reverse=True)
+    assert all(page["total"] is None for page in pages)
+    idea_selects = [s for s in queries.statements if s.startswith("SELECT ideas.id")]
+    assert len(idea_selects) == 3
+    assert all("(ideas.created_at, ideas.id) <" in s for s in idea_selects[1:])
+    assert not any("count(" in s for s in queries.statements)
+
+
+def test_cursor_listing_total_is_optional(offline_client, seed_ideas):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 3)
+
+    response = client.get("/api/ideas/cursor", params={"size": 2, "include_total": True})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == 3
+
+
+def test_user_cursor_listing(offline_client):
+    client, engine, session_factory = offline_client
+
+    pages = walk_pages(client, "/api/users/cursor", size=1)
+
+    assert [item["email"] for page in pages for item in page["items"]] == ["tester@example.com"]
+
+
+def test_invalid_cursor_is_rejected(offline_client):
+    client, engine, session_factory = offline_client
+
+    response = client.get("/api/ideas/cursor", params={"cursor": "not a cursor!"})
+
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend import db
+from backend.core.pool_metrics import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, get_pool_stats
+from backend.internal import router as internal_router
+
+
+@pytest.fixture
+def small_pools(tmp_path, monkeypatch):
+    """One-connection pools that time out fast, swapped in for the app's engines."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    monkeypatch.setattr(db, "engine", engine)
+    monkeypatch.setattr(db, "async_engine", async_engine)
+    yield engine
+    engine.dispose()
+
+
+def test_pool_counts_checkouts_and_timeouts(small_pools):
+    first = small_pools.connect()
+    with pytest.raises(exc.TimeoutError):
+        small_pools.connect()
+    stats = get_pool_stats(small_pools)
+    assert (stats["checkouts"], stats["timeouts"], stats["checked_out"]) == (1, 1, 1)
+    first.close()
+
+    with small_pools.connect():
+        pass
+    stats = get_pool_stats(small_pools)
+    assert (stats["checkouts"], stats["timeouts"], stats["checked_out"], stats["checked_in"]) == (2, 1, 0, 1)
+    assert stats["pool_size"] == 1 and stats["overflow"] == 0
+    assert stats["wait_seconds_max"] >= stats["wait_seconds_avg"] >= 0
+
+
+def test_pool_endpoint_requires_the_internal_token(small_pools, monkeypatch):
+    from main import app
+
+    client = TestClient(app)
+    small_pools.connect().close()
+
+    monkeypatch.setattr(internal_router, "INTERNAL_TOKEN", "")
+    assert client.get("/internal/db/pool", headers={"X-Internal-Token": ""}).status_code == 404
+
+    monkeypatch.setattr(internal_router, "INTERNAL_TOKEN", "s3cret")
+    assert client.get("/internal/db/pool").status_code == 401
+    assert client.get("/internal/outbox", headers={"X-Internal-Token": "wrong"}).status_code == 401
+
+    response = client.get("/internal/db/pool", headers={"X-Internal-Token": "s3cret"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["sync"]["checkouts"] == 1 and payload["sync"]["timeouts"] == 0
+    assert payload["async"]["checkouts"] == 0 and payload["async"]["pool_size"] == 1
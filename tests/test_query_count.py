@@ -0,0 +1,56 @@
+import pytest
+
+from backend.core.query_counter import QueryCounter
+
+
+@pytest.mark.parametrize("url", ["/api/ideas/", "/api/ideas/shared"])
+def test_idea_listing_query_count_is_constant(offline_client, seed_ideas, url):
+    """
+    A listing page must cost the same number of statements whether it holds
+    one idea or fifty: relationships are batch-loaded, never per row.
+    """
+    client, engine, session_factory = offline_client
+
+    seed_ideas(session_factory, 1)
+    with QueryCounter(engine) as small_page:
+        response = client.get(url, params={"size": 50})
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == 1
+
+    seed_ideas(session_factory, 49)
+    with QueryCounter(engine) as full_page:
+        response = client.get(url, params={"size": 50})
+    assert response.status_code == 200, response.text
+    items = response.json()["items"]
+    assert len(items) == 50
+    assert all(item["tags"] and item["scripts"] and item["comments"] for item in items)
+    assert items[0]["comments"][0]["user"]["username"] == "tester"
+
+    assert full_page.count == small_page.count, full_page.statements
+
+
+def test_idea_tag_resolution_query_count_is_constant(offline_client):
+    """
+    Creating or retagging an idea resolves all of its tags in a fixed number
+    of statements, however many tags it carries and whether they exist yet.
+    """
+    client, engine, session_factory = offline_client
+    # load the current user up front so every create below starts warm
+    client.get("/api/auth/profile")
+
+    with QueryCounter(engine) as one_tag:
+        response = client.post("/api/ideas/", json={"title": "One", "description": "d", "tags": ["t0"]})
+    assert response.status_code == 201, response.text
+
+    tags = [f"t{i}" for i in range(20)]
+    with QueryCounter(engine) as many_tags:
+        response = client.post("/api/ideas/", json={"title": "Many", "description": "d", "tags": tags})
+    assert response.status_code == 201, response.text
+    assert [tag["name"] for tag in response.json()["tags"]] == tags
+    assert many_tags.count == one_tag.count, many_tags.statements
+
+    with QueryCounter(engine) as retag:
+        response = client.put("/api/ideas/2", json={"tags": ["t5", "new", "t0"]})
+    assert response.status_code == 200, response.text
+    assert [tag["name"] for tag in response.json()["tags"]] == ["t5", "new", "t0"]
+    assert retag.count <= many_tags.count + 1, retag.statements
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from backend.core import rabbitmq
+from benchmarks.amqp_standin import StandInBroker, topic_matches
+from backend.core.rabbitmq import EXCHANGE_NAME, NotificationPublisher
+
+
+async def bound_queue(broker, pattern="#"):
+    channel = await broker.connect().channel()
+    queue = await channel.declare_queue("notifications", durable=True)
+    await queue.bind(EXCHANGE_NAME, routing_key=pattern)
+    return queue
+
+
+def test_topic_matching():
+    assert topic_matches("idea.*", "idea.created")
+    assert not topic_matches("idea.*", "idea.comment.created")
+    assert topic_matches("idea.#", "idea.comment.created")
+    assert topic_matches("#", "anything.at.all")
+
+
+def test_exchange_is_declared_once_and_channels_are_reused():
+    async def scenario():
+        broker = StandInBroker()
+        publisher = NotificationPublisher(broker.connect(), pool_size=2)
+        await publisher.publish("idea.created", {"id": 0})
+        await publisher.publish("idea.created", {"id": 0})
+        queue = await bound_queue(broker, "idea.*")
+        opened, trips = broker.channels_opened, broker.round_trips
+
+        for i in range(20):
+            await publisher.publish("idea.created", {"id": i})
+
+        # publishes reuse the pooled channels and cost one confirm each
+        assert broker.channels_opened == opened == 3
+        assert broker.round_trips - trips == 20
+        assert len(queue.messages) == 20
+        routing_key, message = queue.messages[-1]
+        assert routing_key == "idea.created"
+        assert json.loads(message.body) == {"id": 19}
+        await publisher.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_publishes_stay_within_the_pool():
+    async def scenario():
+        broker = StandInBroker(round_trip=0.001)
+        publisher = NotificationPublisher(broker.connect(), pool_size=3)
+        await publisher.publish("warmup", {})
+        queue = await bound_queue(broker)
+
+        await asyncio.gather(*(publisher.publish("idea.updated", {"id": i}) for i in range(30)))
+
+        # one declare on the first channel, no declares for the rest
+        assert broker.channels_opened == 1 + 3
+        assert len(broker.exchanges) == 1
+        assert len(queue.messages) == 30
+        await publisher.close()
+
+    asyncio.run(scenario())
+
+
+def test_publish_batch_waits_for_all_confirms():
+    async def scenario():
+        broker = StandInBroker()
+        publisher = NotificationPublisher(broker.connect())
+        await publisher.publish("warmup", {})
+        queue = await bound_queue(broker, "comment.#")
+
+        await publisher.publish_batch([("comment.created", {"n": i}) for i in range(5)])
+
+        assert [json.loads(m.body)["n"] for _, m in queue.messages] == list(range(5))
+        await publisher.close()
+
+    asyncio.run(scenario())
+
+
+def test_closed_channel_is_replaced():
+    async def scenario():
+        broker = StandInBroker()
+        publisher = NotificationPublisher(broker.connect(), pool_size=1)
+        await publisher.publish("warmup", {})
+        await publisher._slots[0][0].close()
+
+        await publisher.publish("warmup", {})
+        await publisher.publish("warmup", {})
+
+        assert broker.channels_opened == 2
+        await publisher.close()
+
+    asyncio.run(scenario())
+
+
+def test_publish_notification_message_without_publisher_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(rabbitmq, "_publisher", None)
+    asyncio.run(rabbitmq.publish_notification_message("idea.created", {"id": 1}))
@@ -0,0 +1,6 @@
+def test_missing_scripts_are_not_found(offline_client):
+    client, engine, session_factory = offline_client
+
+    assert client.get("/api/scripts/999").status_code == 404
+    assert client.put("/api/scripts/999", json={"idea_id": 1, "title": "x", "script_content": "y"}).status_code == 404
+    assert client.delete("/api/scripts/999").status_code == 404
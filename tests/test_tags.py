@@ -0,0 +1,31 @@
+def test_tag_crud(offline_client):
+    client, engine, session_factory = offline_client
+
+    created = client.post("/api/tags/", json={"name": "backend", "description": "server side"})
+    assert created.status_code == 201, created.text
+    assert created.json() == {"name": "backend", "description": "server side"}
+    # the same name twice in one collection is rejected
+    assert client.post("/api/tags/", json={"name": "backend", "description": "again"}).status_code == 400
+    client.post("/api/tags/", json={"name": "frontend", "description": "client side"})
+
+    listed = client.get("/api/tags/")
+    assert listed.status_code == 200
+    tags = {tag["name"]: tag for tag in listed.json()}
+    assert sorted(tags) == ["backend", "frontend"]
+    tag_id = tags["backend"]["id"]
+    assert client.get(f"/api/tags/{tag_id}").json() == {"name": "backend", "description": "server side"}
+
+    updated = client.put(f"/api/tags/{tag_id}", json={"description": "APIs"})
+    assert updated.status_code == 200, updated.text
+    assert updated.json() == {"name": "backend", "description": "APIs"}
+
+    assert client.delete(f"/api/tags/{tag_id}").status_code == 204
+    assert [tag["name"] for tag in client.get("/api/tags/").json()] == ["frontend"]
+
+
+def test_missing_tags_are_not_found(offline_client):
+    client, engine, session_factory = offline_client
+
+    assert client.get("/api/tags/999").status_code == 404
+    assert client.put("/api/tags/999", json={"name": "x"}).status_code == 404
+    assert client.delete("/api/tags/999").status_code == 404
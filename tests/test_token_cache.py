@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.auth import jwt
+from backend.auth.schema import TokenData
+from backend.auth.token_cache import VerifiedTokenCache
+
+
+@pytest.fixture(autouse=True)
+def clean_token_cache():
+    jwt.token_cache.clear()
+    yield
+    jwt.token_cache.clear()
+
+
+def count_decodes(monkeypatch):
+    calls = []
+    original = jwt.jwt.decode
+
+    def decode(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(jwt.jwt, "decode", decode)
+    return calls
+
+
+def test_repeat_requests_skip_verification(monkeypatch):
+    decodes = count_decodes(monkeypatch)
+    token = jwt.create_access_token(data={"sub": "tester@example.com", "id": 1})
+
+    first = jwt.get_current_user(token)
+    second = jwt.get_current_user(token)
+
+    assert first == second == TokenData(email="tester@example.com", id=1)
+    assert len(decodes) == 1
+    assert jwt.token_cache.stats()["hits"] == 1
+
+
+def test_invalid_tokens_are_never_cached(monkeypatch):
+    decodes = count_decodes(monkeypatch)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            jwt.get_current_user("not-a-token")
+        assert error.value.status_code == 401
+
+    assert len(decodes) == 2
+    assert jwt.token_cache.stats()["size"] == 0
+
+
+def test_entries_expire_with_the_token():
+    cache = VerifiedTokenCache(maxsize=10, ttl_seconds=300)
+    data = TokenData(email="tester@example.com", id=1)
+
+    cache.put("expired", data, token_exp=time.time() - 1)
+    cache.put("valid", data, token_exp=time.time() + 60)
+
+    assert cache.get("expired") is None
+    assert cache.get("valid") == data
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(maxsize=2, ttl_seconds=300)
+    data = TokenData(email="tester@example.com", id=1)
+
+    cache.put("a", data, None)
+    cache.put("b", data, None)
+    cache.get("a")
+    cache.put("c", data, None)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == data
+    assert cache.get("c") == data
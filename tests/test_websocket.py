@@ -0,0 +1,326 @@
+import asyncio
+import json
+import time
+
+import fakeredis
+import pytest
+
+from backend.auth.jwt import create_access_token
+from backend.core.broadcast import BroadcastBus, InMemoryBus, InMemoryHub, RedisBus
+from backend.core.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, name, delay=0.0):
+        self.client = name
+        self.delay = delay
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slow_client_is_dropped_without_delaying_the_others():
+    async def scenario():
+        manager = ConnectionManager(queue_size=10, send_timeout=0.05)
+        fast = [FakeWebSocket(f"fast-{i}") for i in range(3)]
+        slow = FakeWebSocket("slow", delay=10)
+        for websocket in [*fast, slow]:
+            await manager.connect(websocket)
+
+        await manager.broadcast("hello")
+        await settle()
+        assert all(w.received == ["hello"] for w in fast)
+
+        await asyncio.sleep(0.1)
+        assert slow not in manager.active_connections
+        assert slow.closed_with == 1013
+        await manager.broadcast("again")
+        await settle()
+        assert all(w.received == ["hello", "again"] for w in fast)
+        assert manager.stats()["dropped"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_client_overflowing_its_queue_is_dropped():
+    async def scenario():
+        manager = ConnectionManager(queue_size=2, send_timeout=10)
+        stuck = FakeWebSocket("stuck", delay=10)
+        await manager.connect(stuck)
+
+        for i in range(4):
+            await manager.broadcast(f"m{i}")
+        await settle()
+
+        assert stuck not in manager.active_connections
+        assert stuck.closed_with == 1013
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_cost_stays_flat_with_thousands_of_clients():
+    async def scenario():
+        manager = ConnectionManager(queue_size=10, send_timeout=1)
+        clients = [FakeWebSocket(i, delay=0.5) for i in range(3000)]
+        for websocket in clients:
+            await manager.connect(websocket)
+
+        started = time.perf_counter()
+        await manager.broadcast("ping")
+        elapsed = time.perf_counter() - started
+
+        # the broadcast only queues; nobody waits on the half-second sends
+        assert elapsed < 0.25
+        assert manager.stats()["queued"] == 3000
+        for websocket in clients:
+            manager.disconnect(websocket)
+
+    asyncio.run(scenario())
+
+
+def test_chat_endpoint_round_trip(offline_client):
+    client, engine, session_factory = offline_client
+
+    with client.websocket_connect("/ws/alice") as alice:
+        assert alice.receive_text() == "Client #alice joined the chat"
+        alice.send_text("hi")
+        assert alice.receive_text() == "Client #alice: hi"
+
+
+def test_broadcast_reaches_clients_on_every_worker_through_the_bus():
+    async def scenario():
+        hub = InMemoryHub()
+        workers = [ConnectionManager(), ConnectionManager()]
+        for worker in workers:
+            await worker.start_bus(InMemoryBus(hub))
+        alice, bob = FakeWebSocket("alice"), FakeWebSocket("bob")
+        await workers[0].connect(alice)
+        await workers[1].connect(bob)
+
+        await workers[0].broadcast("from worker 0")
+        await settle()
+
+        assert alice.received == bob.received == ["from worker 0"]
+        for worker in workers:
+            await worker.stop_bus()
+        assert hub.handlers == []
+
+    asyncio.run(scenario())
+
+
+def test_bus_without_publish_cannot_be_built():
+    class ListenOnlyBus(BroadcastBus):
+        async def start(self, handler):
+            pass
+
+        async def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        ListenOnlyBus()
+
+
+def test_redis_bus_publishes_once_and_delivers_on_each_worker():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        workers = [ConnectionManager(), ConnectionManager()]
+        for worker in workers:
+            await worker.start_bus(RedisBus(fakeredis.FakeAsyncRedis(server=server), channel="test-ws"))
+        sockets = [FakeWebSocket("a"), FakeWebSocket("b")]
+        for worker, websocket in zip(workers, sockets):
+            await worker.connect(websocket)
+
+        await workers[1].broadcast("hello")
+        for _ in range(50):
+            if all(w.received for w in sockets):
+                break
+            await asyncio.sleep(0.01)
+
+        assert [w.received for w in sockets] == [["hello"], ["hello"]]
+        for worker in workers:
+            await worker.stop_bus()
+
+    asyncio.run(scenario())
+
+
+def test_broadcast_falls_back_to_local_delivery_when_the_bus_is_down():
+    class BrokenBus(InMemoryBus):
+        async def publish(self, payload):
+            raise ConnectionError("bus down")
+
+    async def scenario():
+        manager = ConnectionManager()
+        await manager.start_bus(BrokenBus())
+        websocket = FakeWebSocket("local")
+        await manager.connect(websocket)
+
+        await manager.broadcast("still here")
+        await settle()
+
+        assert websocket.received == ["still here"]
+
+    asyncio.run(scenario())
+
+
+def test_publish_reaches_only_topic_subscribers():
+    async def scenario():
+        manager = ConnectionManager()
+        watcher, other = FakeWebSocket("watcher"), FakeWebSocket("other")
+        for websocket in (watcher, other):
+            await manager.connect(websocket)
+        manager.subscribe(watcher, "idea:1")
+        manager.subscribe(other, "idea:2")
+
+        await manager.publish("idea:1", "delta")
+        await settle()
+        assert (watcher.received, other.received) == (["delta"], [])
+
+        manager.disconnect(watcher)
+        assert "idea:1" not in manager.topics
+        manager.unsubscribe(other, "idea:2")
+        assert manager.topics == {}
+
+    asyncio.run(scenario())
+
+
+def test_topic_subscriptions_need_access(offline_client, seed_ideas):
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    token = create_access_token(data={"sub": "tester@example.com", "id": 1})
+
+    with client.websocket_connect(f"/ws/alice?token={token}") as alice:
+        alice.receive_text()
+        for topic in ("idea:1", "user:1", "user:2", "idea:99", "everything"):
+            alice.send_text(json.dumps({"action": "subscribe", "topic": topic}))
+        replies = [json.loads(alice.receive_text()) for _ in range(5)]
+
+    assert [r["event"] for r in replies] == ["subscribed", "subscribed", "error", "error", "error"]
+
+    with client.websocket_connect("/ws/anonymous") as anonymous:
+        anonymous.receive_text()
+        anonymous.send_text(json.dumps({"action": "subscribe", "topic": "idea:1"}))
+        assert json.loads(anonymous.receive_text())["event"] == "error"
+
+
+def test_idea_writes_push_deltas_to_their_topics(offline_client, seed_ideas, monkeypatch):
+    from main import app
+    from backend.auth.jwt import get_current_user
+    from backend.auth.schema import TokenData
+    from backend.ideas import services
+
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    events = []
+
+    async def record(topic, event, data):
+        events.append((topic, event, data))
+
+    monkeypatch.setattr(services, "publish_event", record)
+
+    assert client.put("/api/ideas/1", json={"title": "Renamed", "is_shared": 1}).status_code == 200
+    app.dependency_overrides[get_current_user] = lambda: TokenData(email="other@example.com", id=2)
+    assert client.post("/api/ideas/1/comments", json={"content": "nice", "idea_id": 1}).status_code < 300
+
+    assert events[0] == ("idea:1", "idea.updated", {"id": 1, "title": "Renamed"})
+    assert [(topic, event) for topic, event, _ in events[1:]] == [
+        ("idea:1", "comment.created"),
+        ("user:1", "comment.created"),
+    ]
+    assert events[1][2]["content"] == "nice"
+
+
+def test_revoke_ends_other_users_subscriptions_on_every_worker():
+    async def scenario():
+        hub = InMemoryHub()
+        workers = [ConnectionManager(), ConnectionManager()]
+        for worker in workers:
+            await worker.start_bus(InMemoryBus(hub))
+        owner, viewer = FakeWebSocket("owner"), FakeWebSocket("viewer")
+        await workers[0].connect(owner, user_id=1)
+        await workers[1].connect(viewer, user_id=2)
+        workers[0].subscribe(owner, "idea:1")
+        workers[1].subscribe(viewer, "idea:1")
+
+        await workers[0].revoke("idea:1", keep_user_id=1)
+        await workers[0].publish("idea:1", "delta")
+        await settle()
+
+        assert owner.received == ["delta"]
+        assert [json.loads(m) for m in viewer.received] == [
+            {"event": "unsubscribed", "topic": "idea:1", "reason": "access revoked"}
+        ]
+        assert "idea:1" not in workers[1].topics
+        for worker in workers:
+            await worker.stop_bus()
+
+    asyncio.run(scenario())
+
+
+def test_unsharing_or_deleting_an_idea_revokes_its_subscriptions(offline_client, seed_ideas, monkeypatch):
+    from backend.ideas import services
+
+    client, engine, session_factory = offline_client
+    seed_ideas(session_factory, 1)
+    events, revoked = [], []
+
+    async def record(topic, event, data):
+        events.append((topic, event))
+
+    async def revoke(topic, keep_user_id=None):
+        revoked.append((topic, keep_user_id))
+
+    monkeypatch.setattr(services, "publish_event", record)
+    monkeypatch.setattr(services, "revoke_subscriptions", revoke)
+
+    assert client.put("/api/ideas/1", json={"title": "Still shared", "is_shared": 1}).status_code == 200
+    assert revoked == []
+    assert client.put("/api/ideas/1", json={"is_shared": 0}).status_code == 200
+    assert revoked == [("idea:1", 1)]
+    assert client.delete("/api/ideas/1").status_code == 204
+    assert revoked == [("idea:1", 1), ("idea:1", None)]
+    assert events[-1] == ("idea:1", "idea.deleted")
+
+
+def test_batched_connection_gets_a_burst_as_one_array_frame():
+    async def scenario():
+        manager = ConnectionManager(queue_size=500)
+        batched, plain = FakeWebSocket("batched"), FakeWebSocket("plain")
+        await manager.connect(batched, batch_window_ms=30)
+        await manager.connect(plain, batch_window_ms=0)
+
+        started = time.perf_counter()
+        for i in range(50):
+            await manager.broadcast(f"event {i}")
+        while not batched.received:
+            await asyncio.sleep(0.005)
+        waited = time.perf_counter() - started
+
+        assert [json.loads(frame) for frame in batched.received] == [[f"event {i}" for i in range(50)]]
+        assert len(plain.received) == 50
+        assert waited < 0.2
+        assert manager.stats()["frames_sent"] == 51
+        assert manager.stats()["messages_sent"] == 100
+
+    asyncio.run(scenario())
+
+
+def test_chat_endpoint_batches_on_request(offline_client):
+    client, engine, session_factory = offline_client
+
+    with client.websocket_connect("/ws/bob?batch_ms=20") as bob:
+        assert json.loads(bob.receive_text()) == ["Client #bob joined the chat"]